@@ -0,0 +1,107 @@
+"""
+Compare the LaTeX escaping strategies on large resumes.
+
+    python benchmarks/bench_escape.py [--repeat N]
+
+`chained` is the former implementation: ten `str.replace` passes per string
+over an escaped deep copy of `model.model_dump()`. `finalize` is the current
+one: `escape_latex` applied by Jinja to the model as values are written out,
+skipping strings without special characters in a single regex scan.
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict
+
+from synthetic import PROJECT_ROOT, synthetic_resume
+
+from src.models import Layout
+from src.utils.tex import escape_latex, get_environment
+
+TEMPLATES_DIR = PROJECT_ROOT / "templates"
+TEMPLATE_NAME = "classic.tex.j2"
+
+
+def chained_escape_latex(text: str) -> str:
+    if not isinstance(text, str):
+        return text
+
+    text = text.replace("\\", r"\textbackslash{}")
+    text = text.replace("{", r"\{")
+    text = text.replace("}", r"\}")
+    text = text.replace("&", r"\&")
+    text = text.replace("%", r"\%")
+    text = text.replace("$", r"\$")
+    text = text.replace("#", r"\#")
+    text = text.replace("^", r"\textasciicircum{}")
+    text = text.replace("_", r"\_")
+    text = text.replace("~", r"\textasciitilde{}")
+
+    return text
+
+
+def chained_escape_recursive(data: Any) -> Any:
+    if isinstance(data, str):
+        return chained_escape_latex(data)
+    elif isinstance(data, dict):
+        return {key: chained_escape_recursive(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [chained_escape_recursive(item) for item in data]
+    else:
+        return data
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    template = get_environment(TEMPLATES_DIR).get_template(TEMPLATE_NAME)
+    # The former environment had no finalize hook.
+    raw_template = template.environment.overlay(finalize=None).get_template(
+        TEMPLATE_NAME
+    )
+
+    results: Dict[str, Any] = {"repeat": args.repeat, "cases": []}
+    for entries, highlights in [(1, 5), (10, 10), (30, 20)]:
+        model = synthetic_resume(entries, highlights)
+        strings = [h for exp in model.experience for h in exp.highlights]
+
+        results["cases"].append(
+            {
+                "entries": entries,
+                "highlights_per_entry": highlights,
+                "escape_strings_chained_s": best_of(
+                    lambda: [chained_escape_latex(s) for s in strings], args.repeat
+                ),
+                "escape_strings_current_s": best_of(
+                    lambda: [escape_latex(s) for s in strings], args.repeat
+                ),
+                "render_chained_s": best_of(
+                    lambda: raw_template.render(
+                        resume=chained_escape_recursive(model.model_dump()),
+                        layout=Layout(),
+                    ),
+                    args.repeat,
+                ),
+                "render_finalize_s": best_of(
+                    lambda: template.render(resume=model, layout=Layout()),
+                    args.repeat,
+                ),
+            }
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
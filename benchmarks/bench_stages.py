@@ -0,0 +1,167 @@
+"""
+Time each stage of the generation pipeline on synthetic resumes.
+
+    python benchmarks/bench_stages.py [--repeat N] [--skip-compile] [--output FILE]
+
+Stages are timed separately: `validate_resume_model`, `render_tex`,
+`compile_pdf`, `optimize_pdf_bytes` (when pikepdf is installed) and
+`upload_to_bucket`. Uploads go to an in-process fake of
+the GCS client that writes blobs to a temporary directory, so no
+credentials or network are needed. Results are printed as JSON so that two
+runs can be diffed.
+"""
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from synthetic import PROJECT_ROOT, SIZES, synthetic_payload
+
+from src.utils import pdf as pdf_utils
+from src.utils import storage
+from src.utils.optimize import optimize_pdf_bytes
+from src.utils.pdf import compile_pdf
+from src.utils.storage import upload_to_bucket
+from src.utils.tex import render_tex
+from src.utils.validation import validate_resume_model
+
+TEMPLATES_DIR = PROJECT_ROOT / "templates"
+TEMPLATE_NAME = "classic.tex.j2"
+
+
+class FakeBlob:
+    def __init__(self, root: Path, bucket_name: str, name: str):
+        self.path = root / bucket_name / name
+        self.public_url = f"https://storage.googleapis.com/{bucket_name}/{name}"
+
+    def upload_from_filename(self, filename: str, **kwargs: Any) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(filename, self.path)
+
+    def upload_from_string(self, data: bytes, **kwargs: Any) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_bytes(data)
+
+
+class FakeBucket:
+    def __init__(self, root: Path, name: str):
+        self.root = root
+        self.name = name
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self.root, self.name, name)
+
+
+class FakeStorageClient:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def bucket(self, name: str) -> FakeBucket:
+        return FakeBucket(self.root, name)
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+    }
+
+
+def run_case(
+    entries: int,
+    highlights: int,
+    unicode: bool,
+    workdir: Path,
+    repeat: int,
+    compile_enabled: bool,
+) -> Dict[str, Any]:
+    payload = synthetic_payload(entries, highlights, unicode=unicode, long_text=unicode)
+    name = f"bench-{entries}x{highlights}{'-unicode' if unicode else ''}"
+    tex_path = workdir / f"{name}.tex"
+    pdf_path = workdir / f"{name}.pdf"
+
+    model = validate_resume_model(**payload)
+    case: Dict[str, Any] = {
+        "entries": entries,
+        "highlights_per_entry": highlights,
+        "unicode": unicode,
+        "stages": {},
+    }
+
+    case["stages"]["validate"] = timed(lambda: validate_resume_model(**payload), repeat)
+    case["stages"]["render"] = timed(
+        lambda: render_tex(model, tex_path, TEMPLATE_NAME, TEMPLATES_DIR), repeat
+    )
+    case["tex_bytes"] = tex_path.stat().st_size
+
+    if compile_enabled:
+        case["stages"]["compile"] = timed(lambda: compile_pdf(tex_path, pdf_path), repeat)
+    else:
+        # Stand-in so that the upload stage still has a file of a plausible size.
+        pdf_path.write_bytes(b"%PDF-1.5\n" + b"0" * 60_000)
+        case["stages"]["compile"] = None
+    case["pdf_bytes"] = pdf_path.stat().st_size
+
+    case["stages"]["optimize"] = None
+    if compile_enabled:
+        pdf_bytes = pdf_path.read_bytes()
+        optimized, summary = optimize_pdf_bytes(pdf_bytes)
+        if summary is not None:
+            case["stages"]["optimize"] = timed(lambda: optimize_pdf_bytes(pdf_bytes), repeat)
+            case["optimized_pdf_bytes"] = len(optimized)
+
+    case["stages"]["upload"] = timed(
+        lambda: upload_to_bucket(str(pdf_path), pdf_path.name), repeat
+    )
+
+    return case
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-compile", action="store_true")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    compile_enabled = not args.skip_compile and pdf_utils.TECTONIC_BIN.exists()
+
+    with tempfile.TemporaryDirectory(prefix="cvmaker-bench-") as tmp:
+        workdir = Path(tmp)
+        storage._client = FakeStorageClient(workdir / "gcs")
+        storage._buckets.clear()
+
+        cases = [
+            run_case(entries, highlights, unicode, workdir, args.repeat, compile_enabled)
+            for entries, highlights in SIZES
+            for unicode in (False, True)
+        ]
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "compile": compile_enabled,
+        "cases": cases,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
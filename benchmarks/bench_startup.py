@@ -0,0 +1,93 @@
+"""
+Measure the cold-start import cost of the server process.
+
+    python benchmarks/bench_startup.py [--repeat N] [--top N] [--module NAME]
+
+Imports `main` (or --module) in fresh interpreters run with
+`python -X importtime` and reports, per module, the median self and
+cumulative import time in microseconds, together with the median wall time
+of the whole import. Modules of this project are always listed; others only
+when they are among the --top slowest. Results are printed as JSON so that
+two runs can be diffed.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from synthetic import PROJECT_ROOT
+
+PROJECT_PACKAGES = ("main", "src")
+
+
+def import_times(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_s = time.perf_counter() - started
+
+    # Lines look like "import time:  self [us] | cumulative | imported package".
+    times: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        times[name] = (int(fields[0]), int(fields[1]))
+
+    return wall_s, times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--module", default="main")
+    args = parser.parse_args()
+
+    walls: List[float] = []
+    samples: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    for _ in range(args.repeat):
+        wall_s, times = import_times(args.module)
+        walls.append(wall_s)
+        for name, value in times.items():
+            samples[name].append(value)
+
+    modules: Dict[str, Dict[str, Any]] = {}
+    for name, values in samples.items():
+        modules[name] = {
+            "self_us": statistics.median(v[0] for v in values),
+            "cumulative_us": statistics.median(v[1] for v in values),
+        }
+
+    slowest = sorted(modules, key=lambda n: modules[n]["cumulative_us"], reverse=True)
+    listed = [
+        name
+        for name in slowest
+        if name.split(".")[0] in PROJECT_PACKAGES or name in slowest[: args.top]
+    ]
+
+    report = {
+        "python": sys.version.split()[0],
+        "module": args.module,
+        "repeat": args.repeat,
+        "wall_s": statistics.median(walls),
+        "import_us": modules.get(args.module, {}).get("cumulative_us"),
+        "modules": {name: modules[name] for name in listed},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Synthetic resume payloads for the benchmarks.
+
+Payloads use the keyword arguments of `validate_resume_model`, i.e. the
+parallel lists the `generate_resume_pdf` tool receives.
+"""
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.models import Resume
+from src.utils.validation import validate_resume_model
+
+ASCII_BULLETS = [
+    "Cut p99 latency by 35% & saved $120k/yr on the data_pipeline #ops",
+    "Led a team of five engineers and shipped the platform ahead of schedule",
+]
+
+UNICODE_BULLETS = [
+    "Développé une plateforme de données « temps réel » — latence réduite de 35 %",
+    "Piloté la migration vers Kubernetes pour 12 équipes à Zürich, Kraków et Málaga",
+]
+
+# (experience entries, highlights per entry)
+SIZES = [(1, 0), (1, 5), (5, 5), (10, 10), (15, 20), (30, 20)]
+
+
+def _bullets(count: int, unicode: bool, long_text: bool) -> List[str]:
+    pool = UNICODE_BULLETS if unicode else ASCII_BULLETS
+    bullets = []
+    for i in range(count):
+        text = pool[i % len(pool)]
+        if long_text:
+            text = " ".join([text] * 4)
+        bullets.append(f"{text} ({i + 1})")
+    return bullets
+
+
+def synthetic_payload(
+    entries: int, highlights: int, unicode: bool = False, long_text: bool = False
+) -> Dict[str, Any]:
+    return {
+        "pdf_title": "Jane Doe - Resume",
+        "pdf_author": "Jane Doe",
+        "name": "Jane Doe",
+        "location": "Paris, France",
+        "email": "jane.doe@example.com",
+        "phone": "+33 6 12 34 56 78",
+        "linkedin_url": "https://www.linkedin.com/in/janedoe",
+        "linkedin_handle": "janedoe",
+        "github_url": "https://github.com/janedoe",
+        "github_handle": "janedoe",
+        "intro_paragraphs": _bullets(2, unicode, long_text),
+        "education_degrees": ["MSc", "BSc"],
+        "education_date_ranges": ["2014 - 2016", "2011 - 2014"],
+        "education_institutions": ["Sorbonne University", "Université de Lyon"],
+        "education_fields_of_study": ["Computer Science", "Mathematics"],
+        "education_highlights": [_bullets(2, unicode, long_text)] * 2,
+        "experience_companies": [f"Company_{i}" for i in range(entries)],
+        "experience_roles": ["Senior Engineer"] * entries,
+        "experience_locations": ["Paris"] * entries,
+        "experience_date_ranges": ["2020 - 2024"] * entries,
+        "experience_highlights": [
+            _bullets(highlights, unicode, long_text) for _ in range(entries)
+        ],
+        "project_titles": ["resume_tools"],
+        "project_repo_urls": ["https://github.com/janedoe/resume_tools"],
+        "project_repo_labels": ["janedoe/resume_tools"],
+        "project_highlights": [_bullets(3, unicode, long_text)],
+        "languages": ["Python", "C++", "C#"],
+        "technologies": ["PostgreSQL", "Kubernetes", "Terraform"],
+    }
+
+
+def synthetic_resume(
+    entries: int, highlights: int, unicode: bool = False, long_text: bool = False
+) -> Resume:
+    return validate_resume_model(
+        **synthetic_payload(entries, highlights, unicode=unicode, long_text=long_text)
+    )
@@ -1,9 +1,16 @@
-from typing import List, Optional
+from typing import Annotated, Any, Dict, List, Optional
+import argparse
 import logging
+import sys
+import time
 
-from fastmcp import FastMCP
+from decouple import config
+from fastmcp import Context, FastMCP
+from fastmcp.exceptions import ToolError
 from pathlib import Path
-from uuid import uuid4
+from pydantic import WithJsonSchema
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,18 +18,88 @@ logging.basicConfig(
 )
 
 from src.instructions import (
+    BATCH_TOOL_DESCRIPTION,
     RESUME_INSTRUCTIONS_PROMPT,
+    PREVIEW_TOOL_DESCRIPTION,
+    STATUS_TOOL_DESCRIPTION,
     SERVER_INSTRUCTIONS,
+    STRUCTURED_TOOL_DESCRIPTION,
     TOOL_DESCRIPTION,
+    UPDATE_TOOL_DESCRIPTION,
 )
-from src.generate import generate_resume
-from src.utils.storage import upload_to_bucket
+from src.models import Resume
+from src.generate import (
+    pipeline_stage,
+    publish_resume_async,
+    publish_resume_batch_async,
+)
+from src.utils.admission import ServerBusy, admission
+from src.utils.cache import is_resume_key, pdf_cache
+from src.utils.deadline import REQUEST_TIMEOUT, DeadlineExceeded, deadline
+from src.utils.drafts import draft_store
+from src.utils.metrics import register_collector, render_metrics, track_request
+from src.utils.patch import JsonPatchError
+from src.utils.pdf import JOB_TMP_ROOT, is_tectonic_warm
+from src.utils.preview import render_html_string
+from src.utils.scheduler import SchedulerFull, compile_scheduler
+from src.utils.singleflight import single_flight
+from src.utils.storage import (
+    LOCAL_FILES_ROUTE,
+    LocalBackend,
+    blob_exists_async,
+    blobs_expire,
+    public_url,
+    storage_backend,
+)
+from src.utils.tracing import tracer
+from src.utils.tex import precompile_templates
+from src.utils.uploads import BACKGROUND_UPLOADS, LIVE, upload_queue
+from src.utils.workdirs import (
+    OUTPUT_MAX_BYTES,
+    OUTPUT_SWEEP_INTERVAL,
+    OUTPUT_TTL,
+    OutputSweeper,
+)
+from src.utils.validation import (
+    RESUME_JSON_SCHEMA,
+    patch_resume_model,
+    validate_resume_document,
+    validate_resume_model,
+)
+from src.warmup import warm_up, warm_up_in_background, warm_up_pending
 
 
 SERVER_NAME = "salutcv"
 TEMPLATES_DIR = Path("./templates")
 TEMPLATE_NAME = "classic.tex.j2"
 OUTPUT_DIR = Path("/tmp/output")
+WARM_UP = config("TECTONIC_WARM_UP", default=True, cast=bool)
+MAX_BATCH_SIZE = config("MAX_BATCH_SIZE", default=50, cast=int)
+
+# Each job compiles in its own directory under OUTPUT_DIR, or JOB_TMP_ROOT
+# for in-memory and fitted compiles, and deletes it; the sweeper bounds what
+# crashed jobs leave behind.
+output_sweeper = OutputSweeper(
+    [OUTPUT_DIR, JOB_TMP_ROOT],
+    ttl=OUTPUT_TTL,
+    max_bytes=OUTPUT_MAX_BYTES,
+    interval=OUTPUT_SWEEP_INTERVAL,
+)
+
+
+def _output_dir_lines() -> List[str]:
+    usage = output_sweeper.usage()
+    return [
+        "# HELP cvmaker_output_artifacts Files in the output and job directories.",
+        "# TYPE cvmaker_output_artifacts gauge",
+        f"cvmaker_output_artifacts {usage['artifacts']}",
+        "# HELP cvmaker_output_bytes Bytes used by the output and job directories.",
+        "# TYPE cvmaker_output_bytes gauge",
+        f"cvmaker_output_bytes {usage['bytes']}",
+    ]
+
+
+register_collector(_output_dir_lines)
 
 
 server_kwargs = {
@@ -37,8 +114,87 @@ mcp = FastMCP(**server_kwargs)
 
 
 @mcp.custom_route("/health", methods=["GET"])
-def health():
-    return {"ok": True}
+@mcp.custom_route("/health/live", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({"ok": True})
+
+
+@mcp.custom_route("/health/ready", methods=["GET"])
+async def readiness(request: Request) -> JSONResponse:
+    warming_up = warm_up_pending.is_set()
+    saturated = admission.saturated()
+    ready = not warming_up and not saturated
+
+    return JSONResponse(
+        {
+            "ready": ready,
+            "warming_up": warming_up,
+            "tectonic_warm": is_tectonic_warm(),
+            "saturated": saturated,
+            "admission": admission.stats(),
+            "compile_queue": compile_scheduler.stats(),
+            "single_flight": single_flight.stats(),
+            "uploads": upload_queue.stats(),
+            "output_dir": output_sweeper.usage(),
+        },
+        status_code=200 if ready else 503,
+    )
+
+
+@mcp.custom_route("/status/{draft_id}", methods=["GET"])
+async def status(request: Request) -> JSONResponse:
+    draft_id = request.path_params["draft_id"].removesuffix(".pdf")
+    if not is_resume_key(draft_id):
+        return JSONResponse({"error": "Invalid draft id"}, status_code=400)
+
+    result = await _resume_status(draft_id)
+    return JSONResponse(result, status_code=404 if result["status"] == "missing" else 200)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@mcp.custom_route(LOCAL_FILES_ROUTE + "/{name}", methods=["GET", "HEAD"])
+async def files(request: Request) -> Response:
+    if not isinstance(storage_backend, LocalBackend):
+        return PlainTextResponse("Not Found", status_code=404)
+
+    name = request.path_params["name"]
+    stat_result = storage_backend.stat(name) if name.endswith(".pdf") else None
+    if stat_result is None:
+        return PlainTextResponse("Not Found", status_code=404)
+
+    # Let browsers and CDNs keep the PDF until it expires here.
+    if storage_backend.ttl:
+        max_age = int(storage_backend.ttl - (time.time() - stat_result.st_mtime))
+    else:
+        max_age = 24 * 3600
+    headers = {"cache-control": f"public, max-age={max(max_age, 0)}"}
+
+    # FileResponse handles Range and If-Range requests, and hands the file
+    # to the server when it supports the ASGI pathsend extension.
+    response = FileResponse(
+        storage_backend.path(name),
+        headers=headers,
+        media_type="application/pdf",
+        filename=name,
+        stat_result=stat_result,
+        content_disposition_type="inline",
+    )
+
+    etag = response.headers["etag"]
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={**headers, "etag": etag})
+    return response
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4"
+    )
 
 
 @mcp.prompt(name="base_instructions")
@@ -49,8 +205,57 @@ def base_instructions():
     return RESUME_INSTRUCTIONS_PROMPT
 
 
+async def _resume_status(draft_id: str) -> Dict[str, Any]:
+    blob_name = f"{draft_id}.pdf"
+
+    upload = upload_queue.get(blob_name)
+    if upload is not None:
+        status = {"draft_id": draft_id, **upload.to_dict()}
+        # The queue does not know when a live PDF expires from local storage.
+        if (
+            upload.state == LIVE
+            and blobs_expire()
+            and not await blob_exists_async(blob_name)
+        ):
+            status.update(status="missing", url=None)
+        return status
+
+    # Uploaded in the foreground, or before a restart.
+    url = pdf_cache.peek(draft_id)
+    if url is None or blobs_expire():
+        url = public_url(blob_name) if await blob_exists_async(blob_name) else None
+
+    return {
+        "draft_id": draft_id,
+        "status": "live" if url is not None else "missing",
+        "url": url,
+        "attempts": None,
+        "error": None,
+    }
+
+
+async def _publish(model: Resume, max_pages: Optional[int]) -> str:
+    try:
+        return await publish_resume_async(
+            model=model,
+            template_name=TEMPLATE_NAME,
+            templates_dir=TEMPLATES_DIR,
+            output_dir=OUTPUT_DIR,
+            cache=pdf_cache,
+            admission=admission,
+            max_pages=max_pages,
+            drafts=draft_store,
+            inflight=single_flight,
+            uploads=upload_queue if BACKGROUND_UPLOADS else None,
+        )
+    except (ServerBusy, SchedulerFull) as e:
+        raise ToolError("Server busy, please retry in a few seconds") from e
+    except DeadlineExceeded as e:
+        raise ToolError(f"Resume generation timed out: {e}") from e
+
+
 @mcp.tool(name="generate_resume_pdf", description=RESUME_INSTRUCTIONS_PROMPT)
-def generate_resume_pdf(
+async def generate_resume_pdf(
     pdf_title: str,
     pdf_author: str,
     # Required Header
@@ -87,6 +292,8 @@ def generate_resume_pdf(
     # Technologies
     languages: Optional[List[str]] = None,
     technologies: Optional[List[str]] = None,
+    # Layout
+    max_pages: Optional[int] = None,
 ) -> str:
     """
     Generate a professional resume PDF from structured data using LaTeX templating.
@@ -121,12 +328,11 @@ def generate_resume_pdf(
         project_highlights (Optional[List[List[str]]]): List of lists containing bullet points for each project
         languages (Optional[List[str]]): List of programming languages
         technologies (Optional[List[str]]): List of technologies/frameworks/tools
+        max_pages (Optional[int]): Shrink font size, margins and spacing until the PDF fits in this many pages (e.g., 1)
 
     Returns:
         str: URL of the generated PDF file
     """
-    base_name = str(uuid4().hex)
-
     # Log all parameters
     params = {
         'pdf_title': pdf_title,
@@ -160,61 +366,218 @@ def generate_resume_pdf(
         'technologies': technologies,
     }
 
+    if max_pages is not None and max_pages < 1:
+        raise ValueError("max_pages must be at least 1")
+
     logging.info("Generating resume with parameters:")
     for key, value in params.items():
         if value is not None:
             logging.info(f"{key}: {value}")
 
-    pdf_path = generate_resume(
-        base_name=base_name,
-        template_name=TEMPLATE_NAME,
-        templates_dir=TEMPLATES_DIR,
-        output_dir=OUTPUT_DIR,
-        # Document meta
-        pdf_title=pdf_title,
-        pdf_author=pdf_author,
-        # Header
-        name=name,
-        location=location,
-        email=email,
-        phone=phone,
-        website_url=website_url,
-        website_label=website_label,
-        linkedin_url=linkedin_url,
-        linkedin_handle=linkedin_handle,
-        github_url=github_url,
-        github_handle=github_handle,
-        # Intro section
-        intro_paragraphs=intro_paragraphs,
-        # Education entries
-        education_degrees=education_degrees,
-        education_date_ranges=education_date_ranges,
-        education_institutions=education_institutions,
-        education_fields_of_study=education_fields_of_study,
-        education_highlights=education_highlights,
-        # Experience entries
-        experience_companies=experience_companies,
-        experience_roles=experience_roles,
-        experience_locations=experience_locations,
-        experience_date_ranges=experience_date_ranges,
-        experience_highlights=experience_highlights,
-        # Project entries
-        project_titles=project_titles,
-        project_repo_urls=project_repo_urls,
-        project_repo_labels=project_repo_labels,
-        project_highlights=project_highlights,
-        # Technologies
-        languages=languages,
-        technologies=technologies,
-    )
+    with track_request("generate_resume_pdf"), tracer.span(
+        "generate_resume_pdf"
+    ), deadline(REQUEST_TIMEOUT):
+        with pipeline_stage("validate"):
+            model = validate_resume_model(**params)
+
+        return await _publish(model, max_pages)
+
+
+@mcp.tool(name="generate_resume_pdf_structured", description=STRUCTURED_TOOL_DESCRIPTION)
+async def generate_resume_pdf_structured(
+    resume: Annotated[Dict[str, Any], WithJsonSchema(RESUME_JSON_SCHEMA)],
+    max_pages: Optional[int] = None,
+) -> str:
+    """
+    Generate a resume PDF from the nested resume document.
+
+    Args:
+        resume (Dict[str, Any]): Resume with meta, header, intro_paragraphs, education, experience, projects and technologies_section
+        max_pages (Optional[int]): Shrink font size, margins and spacing until the PDF fits in this many pages (e.g., 1)
+
+    Returns:
+        str: URL of the generated PDF file
+    """
+    if max_pages is not None and max_pages < 1:
+        raise ValueError("max_pages must be at least 1")
+
+    # The MCP server has already checked the arguments against the tool's
+    # JSON schema with `jsonschema`, but that neither sanitizes the strings
+    # nor builds the model, so the resume is validated again here.
+    with track_request("generate_resume_pdf_structured"), tracer.span(
+        "generate_resume_pdf_structured"
+    ), deadline(REQUEST_TIMEOUT):
+        with pipeline_stage("validate"):
+            model = validate_resume_document(resume)
 
-    if pdf_path.exists():
-        return upload_to_bucket(
-            file_path=pdf_path, destination_blob_name=f"{base_name}.pdf"
+        return await _publish(model, max_pages)
+
+
+@mcp.tool(name="preview_resume", description=PREVIEW_TOOL_DESCRIPTION)
+async def preview_resume(
+    resume: Annotated[Optional[Dict[str, Any]], WithJsonSchema(RESUME_JSON_SCHEMA)] = None,
+    draft_id: Optional[str] = None,
+) -> str:
+    """
+    Render a resume to HTML without compiling or uploading a PDF.
+
+    Args:
+        resume (Optional[Dict[str, Any]]): Resume with meta, header, intro_paragraphs, education, experience, projects and technologies_section
+        draft_id (Optional[str]): File name of a PDF URL returned earlier, without .pdf, to preview that resume instead
+
+    Returns:
+        str: Standalone HTML document mirroring the PDF layout
+    """
+    if (resume is None) == (draft_id is None):
+        raise ValueError("Pass either resume or draft_id")
+
+    with track_request("preview_resume"), tracer.span("preview_resume"):
+        if draft_id is not None:
+            draft = draft_store.get(draft_id)
+            if draft is None:
+                raise ToolError(f"Unknown or expired draft {draft_id!r}")
+            model = draft.resume
+        else:
+            with pipeline_stage("validate"):
+                model = validate_resume_document(resume)
+
+        with pipeline_stage("render_html"):
+            return render_html_string(model, TEMPLATE_NAME, TEMPLATES_DIR)
+
+
+@mcp.tool(name="resume_status", description=STATUS_TOOL_DESCRIPTION)
+async def resume_status(draft_id: str) -> Dict[str, Any]:
+    """
+    Report whether the PDF of a generated resume can be downloaded yet.
+
+    Args:
+        draft_id (str): File name of the PDF URL returned for the resume, without .pdf
+
+    Returns:
+        Dict[str, Any]: {"draft_id", "status", "url", "attempts", "error"}, status being pending, live, failed or missing
+    """
+    draft_id = draft_id.removesuffix(".pdf")
+    if not is_resume_key(draft_id):
+        raise ValueError(f"Invalid draft id {draft_id!r}")
+
+    with track_request("resume_status"):
+        return await _resume_status(draft_id)
+
+
+@mcp.tool(name="update_resume_pdf", description=UPDATE_TOOL_DESCRIPTION)
+async def update_resume_pdf(
+    draft_id: str,
+    patch: List[Dict[str, Any]],
+    max_pages: Optional[int] = None,
+) -> str:
+    """
+    Apply a JSON Patch to a previously generated resume and regenerate it.
+
+    Args:
+        draft_id (str): File name of the PDF URL returned for the resume, without .pdf
+        patch (List[Dict[str, Any]]): JSON Patch operations against the resume document
+        max_pages (Optional[int]): Page limit, defaults to the one the draft was generated with
+
+    Returns:
+        str: URL of the regenerated PDF file
+    """
+    draft = draft_store.get(draft_id)
+    if draft is None:
+        raise ToolError(
+            f"Unknown or expired draft {draft_id!r}, generate the resume again "
+            f"with generate_resume_pdf"
+        )
+
+    if max_pages is None:
+        max_pages = draft.max_pages
+    elif max_pages < 1:
+        raise ValueError("max_pages must be at least 1")
+
+    logging.info(f"Updating draft {draft_id} with {len(patch)} patch operations")
+
+    with track_request("update_resume_pdf"), tracer.span(
+        "update_resume_pdf", draft_id=draft_id, operations=len(patch)
+    ), deadline(REQUEST_TIMEOUT):
+        with pipeline_stage("validate"):
+            try:
+                model = patch_resume_model(draft.resume, patch)
+            except JsonPatchError as e:
+                raise ToolError(f"Invalid patch: {e}") from e
+
+        return await _publish(model, max_pages)
+
+
+@mcp.tool(name="generate_resume_pdfs_batch", description=BATCH_TOOL_DESCRIPTION)
+async def generate_resume_pdfs_batch(
+    resumes: List[Dict[str, Any]], ctx: Context
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Generate several resume PDFs concurrently.
+
+    Args:
+        resumes (List[Dict[str, Any]]): Resume payloads, each with the same fields as generate_resume_pdf
+
+    Returns:
+        List[Dict[str, Optional[str]]]: One {"url", "error"} object per payload, in input order
+    """
+    if len(resumes) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} resumes can be generated per batch")
+
+    logging.info(f"Generating a batch of {len(resumes)} resumes")
+
+    async def report(done: int, total: int, index: int, result: Dict[str, Optional[str]]) -> None:
+        status = "failed" if result["error"] else "done"
+        await ctx.report_progress(
+            progress=done, total=total, message=f"Resume {index + 1} {status}"
+        )
+
+    with track_request("generate_resume_pdfs_batch"), tracer.span(
+        "generate_resume_pdfs_batch", items=len(resumes)
+    ):
+        return await publish_resume_batch_async(
+            payloads=resumes,
+            template_name=TEMPLATE_NAME,
+            templates_dir=TEMPLATES_DIR,
+            output_dir=OUTPUT_DIR,
+            cache=pdf_cache,
+            admission=admission,
+            drafts=draft_store,
+            inflight=single_flight,
+            uploads=upload_queue if BACKGROUND_UPLOADS else None,
+            item_timeout=REQUEST_TIMEOUT,
+            on_progress=report,
         )
-    else:
-        return "Error: PDF file not found"
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--warm-up-only",
+        action="store_true",
+        help="populate the tectonic cache and exit (for image builds)",
+    )
+    parser.add_argument(
+        "--precompile-templates",
+        metavar="DIR",
+        type=Path,
+        help="compile the Jinja templates to Python modules in DIR and exit",
+    )
+    args = parser.parse_args()
+
+    if args.precompile_templates:
+        precompile_templates(TEMPLATES_DIR, args.precompile_templates)
+        sys.exit(0)
+
+    if args.warm_up_only:
+        warm_up(TEMPLATE_NAME, TEMPLATES_DIR, OUTPUT_DIR)
+        sys.exit(0)
+
+    output_sweeper.start()
+    storage_backend.start()
+
+    # The server starts answering liveness probes right away; readiness
+    # waits for the warm-up compile.
+    if WARM_UP:
+        warm_up_in_background(TEMPLATE_NAME, TEMPLATES_DIR, OUTPUT_DIR)
+
     mcp.run(transport="streamable-http")
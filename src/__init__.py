@@ -1 +1 @@
-from . import utils, models, instructions, generate
+from . import utils, models, instructions, generate, warmup
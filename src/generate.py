@@ -1,9 +1,98 @@
-from typing import List, Optional
+import asyncio
+import logging
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
+from decouple import config
+
+from .models import Layout, Resume
 from .utils.validation import validate_resume_model
-from .utils.tex import render_tex
-from .utils.pdf import compile_pdf
+from .utils.tex import render_tex, render_tex_string
+from .utils.pdf import (
+    JOB_TMP_ROOT,
+    compile_pdf,
+    compile_pdf_async,
+    compile_pdf_bytes_async,
+)
+from .utils.storage import (
+    blob_exists,
+    blobs_expire,
+    upload_bytes_to_bucket,
+    upload_bytes_to_bucket_async,
+    upload_to_bucket_async,
+)
+from .utils.cache import PdfCache, resume_cache_key
+from .utils.scheduler import compile_scheduler
+from .utils.admission import AdmissionController
+from .utils.drafts import Draft, DraftStore
+from .utils.singleflight import SingleFlight
+from .utils.uploads import UploadQueue
+from .utils.workdirs import job_workdir
+from .utils.deadline import deadline
+from .utils.metrics import PDF_OPTIMIZE_BYTES, PDF_SIZE, track_stage
+from .utils.optimize import PDF_OPTIMIZE, optimize_pdf, optimize_pdf_bytes
+from .utils.tracing import Span, current_span, tracer
+
+
+# Stream the TeX source to tectonic and upload the PDF from memory instead of
+# keeping .tex/.pdf/.log files in the output directory.
+IN_MEMORY_PIPELINE = config("IN_MEMORY_PIPELINE", default=False, cast=bool)
+
+# Layouts tried by `max_pages`, from the classic look down to the most
+# compact one that still reads well.
+FIT_LAYOUTS = [
+    Layout(),
+    Layout(margin=1.5, section_top_space=0.25, section_bottom_space=0.15, item_spacing=0.06),
+    Layout(font_size=9.5, margin=1.25, section_top_space=0.2, section_bottom_space=0.12, item_spacing=0.04),
+    Layout(font_size=9, margin=1.0, section_top_space=0.15, section_bottom_space=0.1, item_spacing=0.02),
+    Layout(font_size=8.5, margin=0.8, section_top_space=0.1, section_bottom_space=0.08, item_spacing=0.0),
+]
+
+
+@contextmanager
+def pipeline_stage(stage: str) -> Iterator[Span]:
+    """
+    Time a pipeline stage in the metrics and record it as a trace span.
+    """
+    with track_stage(stage), tracer.span(stage) as span:
+        yield span
+
+
+def _annotate(**attributes: Any) -> None:
+    span = current_span()
+    if span is not None:
+        span.set_attributes(attributes)
+
+
+def _record_optimize(summary: Optional[Dict[str, int]]) -> None:
+    if summary is None:
+        return
+
+    PDF_OPTIMIZE_BYTES.inc(summary["bytes_before"], direction="in")
+    PDF_OPTIMIZE_BYTES.inc(summary["bytes_after"], direction="out")
+    _annotate(**summary)
+    logging.info(
+        f"Optimised PDF from {summary['bytes_before']} to {summary['bytes_after']} bytes"
+    )
+
+
+def _optimize_file(pdf_path: Path) -> None:
+    with pipeline_stage("optimize"):
+        _record_optimize(optimize_pdf(pdf_path))
+
+
+async def _optimize_file_async(pdf_path: Path) -> None:
+    with pipeline_stage("optimize"):
+        _record_optimize(await asyncio.to_thread(optimize_pdf, pdf_path))
+
+
+async def _optimize_bytes_async(pdf_bytes: bytes) -> bytes:
+    with pipeline_stage("optimize"):
+        pdf_bytes, summary = await asyncio.to_thread(optimize_pdf_bytes, pdf_bytes)
+        _record_optimize(summary)
+    return pdf_bytes
 
 
 def generate_resume(
@@ -54,6 +143,8 @@ def generate_resume(
     # Technologies
     languages: Optional[List[str]] = None,
     technologies: Optional[List[str]] = None,
+    # Shrink the layout until the PDF fits in this many pages
+    max_pages: Optional[int] = None,
 ) -> Path:
     model = validate_resume_model(
         # Document meta
@@ -100,16 +191,434 @@ def generate_resume(
         technologies=technologies,
     )
 
-    out_tex = output_dir / f"{base_name}.tex"
-    out_pdf = output_dir / f"{base_name}.pdf"
+    if max_pages is not None:
+        out_pdf = output_dir / f"{base_name}.pdf"
+        out_pdf.parent.mkdir(parents=True, exist_ok=True)
+        out_pdf.write_bytes(
+            asyncio.run(
+                fit_resume_pdf_async(
+                    model=model,
+                    max_pages=max_pages,
+                    template_name=template_name,
+                    templates_dir=templates_dir,
+                )
+            )
+        )
+        return out_pdf
 
-    render_tex(
-        resume_data=model.model_dump(),
-        output_tex_path=out_tex,
+    return build_resume_pdf(
+        model=model,
+        base_name=base_name,
         template_name=template_name,
         templates_dir=templates_dir,
+        output_dir=output_dir,
     )
 
-    compile_pdf(out_tex, out_pdf)
 
+def build_resume_pdf(
+    model: Resume,
+    base_name: str,
+    template_name: str,
+    templates_dir: Path,
+    output_dir: Path,
+) -> Path:
+    out_tex = output_dir / f"{base_name}.tex"
+    out_pdf = output_dir / f"{base_name}.pdf"
+
+    with pipeline_stage("render"):
+        render_tex(
+            resume_data=model,
+            output_tex_path=out_tex,
+            template_name=template_name,
+            templates_dir=templates_dir,
+        )
+
+    with pipeline_stage("compile"):
+        compile_pdf(out_tex, out_pdf)
+
+    if PDF_OPTIMIZE:
+        _optimize_file(out_pdf)
+
+    pdf_size = out_pdf.stat().st_size
+    PDF_SIZE.observe(pdf_size)
+    _annotate(pdf_bytes=pdf_size)
     return out_pdf
+
+
+def _page_count(summary: Dict[str, int]) -> int:
+    pages = summary.get("pages")
+    if pages is None:
+        raise RuntimeError("Tectonic did not report the page count of the PDF")
+    return pages
+
+
+def _fit_candidate_paths(workdir: Path, index: int) -> Tuple[Path, Path]:
+    return workdir / f"fit{index}.tex", workdir / f"fit{index}.pdf"
+
+
+def _record_fit(index: int, pages: int, max_pages: int, pdf_bytes: bytes) -> None:
+    if pages > max_pages:
+        logging.warning(
+            f"Resume still has {pages} pages with the most compact layout "
+            f"(asked for {max_pages})"
+        )
+
+    PDF_SIZE.observe(len(pdf_bytes))
+    _annotate(fit_layout=index, pages=pages, pdf_bytes=len(pdf_bytes))
+
+
+def _cached_url(cache: PdfCache, base_name: str) -> Optional[str]:
+    url = cache.get(base_name)
+    # Stored PDFs may expire (local storage), never return the URL of one
+    # that is gone.
+    if url is not None and blobs_expire() and not blob_exists(f"{base_name}.pdf"):
+        url = None
+
+    _annotate(cache_hit=url is not None)
+    return url
+
+
+def _background_upload(
+    uploads: UploadQueue,
+    base_name: str,
+    on_live: Optional[Callable[[str], None]],
+    pdf_bytes: bytes,
+) -> str:
+    # The PDF is handed over in memory, the job directory is deleted before
+    # the upload runs.
+    upload = partial(upload_bytes_to_bucket, data=pdf_bytes, destination_blob_name=f"{base_name}.pdf")
+
+    _annotate(background_upload=True)
+    return uploads.submit(f"{base_name}.pdf", upload, on_live)
+
+
+async def build_resume_pdf_async(
+    model: Resume,
+    base_name: str,
+    template_name: str,
+    templates_dir: Path,
+    output_dir: Path,
+) -> Path:
+    out_tex = output_dir / f"{base_name}.tex"
+    out_pdf = output_dir / f"{base_name}.pdf"
+
+    with pipeline_stage("render"):
+        render_tex(
+            resume_data=model,
+            output_tex_path=out_tex,
+            template_name=template_name,
+            templates_dir=templates_dir,
+        )
+
+    with pipeline_stage("compile"):
+        await compile_pdf_async(out_tex, out_pdf)
+
+    if PDF_OPTIMIZE:
+        await _optimize_file_async(out_pdf)
+
+    pdf_size = out_pdf.stat().st_size
+    PDF_SIZE.observe(pdf_size)
+    _annotate(pdf_bytes=pdf_size)
+    return out_pdf
+
+
+async def build_resume_pdf_bytes_async(
+    model: Resume,
+    template_name: str,
+    templates_dir: Path,
+) -> bytes:
+    with pipeline_stage("render"):
+        tex_source = render_tex_string(model, template_name, templates_dir)
+
+    with pipeline_stage("compile"):
+        pdf_bytes = await compile_pdf_bytes_async(tex_source)
+
+    if PDF_OPTIMIZE:
+        pdf_bytes = await _optimize_bytes_async(pdf_bytes)
+
+    PDF_SIZE.observe(len(pdf_bytes))
+    _annotate(pdf_bytes=len(pdf_bytes))
+    return pdf_bytes
+
+
+async def _compile_layout_async(
+    model: Resume,
+    index: int,
+    template_name: str,
+    templates_dir: Path,
+    workdir: Path,
+) -> Tuple[bytes, int]:
+    layout = FIT_LAYOUTS[index]
+    out_tex, out_pdf = _fit_candidate_paths(workdir, index)
+
+    with tracer.span("fit_candidate", index=index, **layout.model_dump()) as span:
+        with pipeline_stage("render"):
+            render_tex(model, out_tex, template_name, templates_dir, layout)
+        with pipeline_stage("compile"):
+            pages = _page_count(await compile_pdf_async(out_tex, out_pdf))
+        span.set_attribute("pages", pages)
+
+    return out_pdf.read_bytes(), pages
+
+
+async def fit_resume_pdf_async(
+    model: Resume,
+    max_pages: int,
+    template_name: str,
+    templates_dir: Path,
+    limit: Optional[asyncio.Semaphore] = None,
+) -> bytes:
+    """
+    Compile the resume with every layout of `FIT_LAYOUTS` concurrently and
+    return the PDF of the roomiest one that fits in `max_pages`, or of the
+    most compact one when none does. Candidates still compiling once a
+    roomier layout is known to fit are cancelled, which kills their
+    tectonic process.
+
+    Each candidate holds `limit` while it compiles; by default the fit gets
+    one slot per compile worker of its own.
+    """
+    if limit is None:
+        limit = asyncio.Semaphore(compile_scheduler.workers)
+
+    async def run(index: int, workdir: Path) -> Tuple[bytes, int]:
+        async with limit:
+            return await _compile_layout_async(
+                model, index, template_name, templates_dir, workdir
+            )
+
+    with job_workdir(JOB_TMP_ROOT, "fit") as workdir:
+        tasks = [
+            asyncio.create_task(run(index, workdir))
+            for index in range(len(FIT_LAYOUTS))
+        ]
+        try:
+            for index, task in enumerate(tasks):
+                pdf_bytes, pages = await task
+                if pages <= max_pages:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    if PDF_OPTIMIZE:
+        pdf_bytes = await _optimize_bytes_async(pdf_bytes)
+
+    _record_fit(index, pages, max_pages, pdf_bytes)
+    return pdf_bytes
+
+
+async def _build_and_upload_async(
+    model: Resume,
+    base_name: str,
+    template_name: str,
+    templates_dir: Path,
+    output_dir: Path,
+    admission: Optional[AdmissionController],
+    max_pages: Optional[int],
+    uploads: Optional[UploadQueue] = None,
+    on_live: Optional[Callable[[str], None]] = None,
+    fit_limit: Optional[asyncio.Semaphore] = None,
+) -> str:
+    with admission.admit() if admission is not None else nullcontext():
+        if max_pages is not None or IN_MEMORY_PIPELINE:
+            if max_pages is not None:
+                pdf_bytes = await fit_resume_pdf_async(
+                    model=model,
+                    max_pages=max_pages,
+                    template_name=template_name,
+                    templates_dir=templates_dir,
+                    limit=fit_limit,
+                )
+            else:
+                pdf_bytes = await build_resume_pdf_bytes_async(
+                    model=model,
+                    template_name=template_name,
+                    templates_dir=templates_dir,
+                )
+            if uploads is not None:
+                return _background_upload(uploads, base_name, on_live, pdf_bytes=pdf_bytes)
+            with pipeline_stage("upload"):
+                url = await upload_bytes_to_bucket_async(
+                    data=pdf_bytes, destination_blob_name=f"{base_name}.pdf"
+                )
+        else:
+            with job_workdir(output_dir, base_name[:8]) as workdir:
+                pdf_path = await build_resume_pdf_async(
+                    model=model,
+                    base_name=base_name,
+                    template_name=template_name,
+                    templates_dir=templates_dir,
+                    output_dir=workdir,
+                )
+                if uploads is not None:
+                    return _background_upload(
+                        uploads, base_name, on_live, pdf_bytes=pdf_path.read_bytes()
+                    )
+                with pipeline_stage("upload"):
+                    url = await upload_to_bucket_async(
+                        file_path=pdf_path, destination_blob_name=pdf_path.name
+                    )
+
+    return url
+
+
+async def publish_resume_async(
+    model: Resume,
+    template_name: str,
+    templates_dir: Path,
+    output_dir: Path,
+    cache: Optional[PdfCache] = None,
+    admission: Optional[AdmissionController] = None,
+    max_pages: Optional[int] = None,
+    drafts: Optional[DraftStore] = None,
+    inflight: Optional[SingleFlight] = None,
+    uploads: Optional[UploadQueue] = None,
+    fit_limit: Optional[asyncio.Semaphore] = None,
+) -> str:
+    """
+    Build and upload the resume, reusing the previous upload when the same
+    content was already published with the same template. Tectonic runs as
+    an asyncio subprocess and the upload runs off the event loop.
+
+    The blob name is derived from the content hash, so retries of an
+    identical request always map to the same object. Cache hits are served
+    even when `admission` would reject new builds. With `max_pages`, the
+    layout is shrunk until the PDF fits, see `fit_resume_pdf_async`. With
+    `drafts`, the resume is kept under its blob name for `update_resume_pdf`.
+    With `inflight`, a request identical to one still being built waits for
+    that build instead of compiling the same PDF again. With `uploads`, the
+    URL is returned as soon as the PDF is built and the upload finishes in
+    the background; the cache only learns about the PDF once it is live.
+    `fit_limit` is passed on to `fit_resume_pdf_async`.
+    """
+    base_name = resume_cache_key(model, template_name, templates_dir, max_pages)
+    _annotate(base_name=base_name)
+
+    if cache is not None:
+        cached_url = _cached_url(cache, base_name)
+        if cached_url is not None:
+            if drafts is not None:
+                drafts.put(base_name, Draft(model, max_pages))
+            return cached_url
+
+    if uploads is not None:
+        queued_url = uploads.url_for(f"{base_name}.pdf")
+        if queued_url is not None:
+            if drafts is not None:
+                drafts.put(base_name, Draft(model, max_pages))
+            return queued_url
+
+    def remember(url: str) -> None:
+        if cache is not None:
+            cache.put(base_name, url)
+
+    async def build() -> str:
+        url = await _build_and_upload_async(
+            model=model,
+            base_name=base_name,
+            template_name=template_name,
+            templates_dir=templates_dir,
+            output_dir=output_dir,
+            admission=admission,
+            max_pages=max_pages,
+            uploads=uploads,
+            on_live=remember,
+            fit_limit=fit_limit,
+        )
+        if uploads is None:
+            remember(url)
+        return url
+
+    if inflight is not None:
+        url, coalesced = await inflight.do_async(base_name, build)
+        _annotate(coalesced=coalesced)
+    else:
+        url = await build()
+
+    if drafts is not None:
+        drafts.put(base_name, Draft(model, max_pages))
+
+    return url
+
+
+async def publish_resume_batch_async(
+    payloads: List[Dict[str, Any]],
+    template_name: str,
+    templates_dir: Path,
+    output_dir: Path,
+    cache: Optional[PdfCache] = None,
+    admission: Optional[AdmissionController] = None,
+    drafts: Optional[DraftStore] = None,
+    inflight: Optional[SingleFlight] = None,
+    uploads: Optional[UploadQueue] = None,
+    item_timeout: Optional[float] = None,
+    on_progress: Optional[
+        Callable[[int, int, int, Dict[str, Optional[str]]], Awaitable[None]]
+    ] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Validate, build and upload several resumes concurrently.
+
+    Each payload takes the keyword arguments of `validate_resume_model`,
+    plus an optional `max_pages`.
+    Results are returned in input order as {"url", "error"} dicts, so one
+    invalid payload does not fail the whole batch. `item_timeout` bounds
+    each resume separately, from the moment it gets its turn.
+    """
+    total = len(payloads)
+    done = 0
+    # Never queue more compiles than there are workers, so that a large batch
+    # does not fill the scheduler queue and get its own items or other
+    # requests rejected. A resume with `max_pages` compiles several layouts,
+    # so its candidates draw from the same budget as the other items'
+    # compiles instead of each fit bringing a budget of its own.
+    items = asyncio.Semaphore(compile_scheduler.workers)
+    compiles = asyncio.Semaphore(compile_scheduler.workers)
+
+    async def run_one(index: int, payload: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        nonlocal done
+
+        try:
+            with tracer.span("batch_item", index=index):
+                fields = dict(payload)
+                max_pages = fields.pop("max_pages", None)
+                if max_pages is not None and (
+                    not isinstance(max_pages, int)
+                    or isinstance(max_pages, bool)
+                    or max_pages < 1
+                ):
+                    raise ValueError("max_pages must be at least 1")
+                with pipeline_stage("validate"):
+                    model = validate_resume_model(**fields)
+                async with items:
+                    with deadline(item_timeout):
+                        async with compiles if max_pages is None else nullcontext():
+                            url = await publish_resume_async(
+                                model=model,
+                                template_name=template_name,
+                                templates_dir=templates_dir,
+                                output_dir=output_dir,
+                                cache=cache,
+                                admission=admission,
+                                max_pages=max_pages,
+                                drafts=drafts,
+                                inflight=inflight,
+                                uploads=uploads,
+                                fit_limit=compiles,
+                            )
+            result = {"url": url, "error": None}
+        except Exception as e:
+            logging.warning(f"Batch item {index} failed: {e}")
+            result = {"url": None, "error": str(e)}
+
+        done += 1
+        if on_progress is not None:
+            await on_progress(done, total, index, result)
+
+        return result
+
+    return list(
+        await asyncio.gather(*(run_one(i, p) for i, p in enumerate(payloads)))
+    )
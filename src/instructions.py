@@ -10,6 +10,52 @@ TOOL_DESCRIPTION = (
 )
 
 
+BATCH_TOOL_DESCRIPTION = (
+    "Generate several resume PDFs in one call, for example one candidate "
+    "tailored to several job offers. Each item of `resumes` is an object with "
+    "the same fields as the generate_resume_pdf tool (pdf_title, pdf_author, "
+    "name, location, email, experience_companies, ..., max_pages). Returns one "
+    "{url, error} object per item, in input order."
+)
+
+
+STRUCTURED_TOOL_DESCRIPTION = (
+    "Generate a resume PDF from a single nested `resume` object (meta, header, "
+    "intro_paragraphs, education, experience, projects, technologies_section), "
+    "each entry carrying its own fields and highlights. Same result as "
+    "generate_resume_pdf, without the parallel lists. Returns the PDF URL."
+)
+
+
+PREVIEW_TOOL_DESCRIPTION = (
+    "Preview a resume draft as HTML in milliseconds, without compiling or "
+    "uploading a PDF. Use it to show intermediate drafts during the interview; "
+    "call a generate tool only for the final version. Pass either the nested "
+    "`resume` object (same as generate_resume_pdf_structured) or the "
+    "`draft_id` of a resume generated earlier."
+)
+
+
+UPDATE_TOOL_DESCRIPTION = (
+    "Edit a resume generated earlier without resending it. `draft_id` is the "
+    "file name of its PDF URL without the .pdf extension. `patch` is a JSON "
+    "Patch (RFC 6902) against the resume document, whose fields are meta, "
+    "header, intro_paragraphs, education, experience, projects and "
+    "technologies_section, e.g. [{\"op\": \"replace\", \"path\": "
+    "\"/experience/0/highlights/1\", \"value\": \"...\"}]. Returns the URL of "
+    "the new PDF, whose name is the draft id for the next edit."
+)
+
+
+STATUS_TOOL_DESCRIPTION = (
+    "Check whether the PDF of a generated resume is online yet. The server may "
+    "return the URL before the upload finishes; call this with `draft_id`, the "
+    "file name of the URL without the .pdf extension, before sharing the link "
+    "if it does not open. Status is pending, live, failed (generate the resume "
+    "again) or missing."
+)
+
+
 RESUME_INSTRUCTIONS_PROMPT = """You are an expert resumé writer specialized in recruitment optimization.  
 Your task is to generate **Resumé-ready content** for the candidate, aligned with the job offer when available.
 
@@ -61,6 +107,7 @@ Use this **question checklist** to fill the model:
 - **Closing impact:** every experience must end with a **clear victory or positive outcome**.  
 - **Skills:** if the role is highly attractive, include one extra relevant skill/tool (even if not fully mastered).  
 - **Technical clarity:** make tools, frameworks, and methodologies explicit and easy to spot.  
+- **Characters:** Latin script only, no emoji, CJK or pictographic symbols: the PDF font cannot render them and such fields are rejected.  
 
 ### Output:
 Draft resumé content (sentences, bullet points, highlights) strictly following the rules above,  
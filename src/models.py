@@ -1,6 +1,22 @@
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, EmailStr, HttpUrl, Field
+from typing import Annotated, List, Optional
+from pydantic import AfterValidator, BaseModel, HttpUrl, Field, WithJsonSchema
+
+
+def _validate_email(value: str) -> str:
+    # email_validator is slow to import; load it on the first validation
+    # rather than when the models are defined, as EmailStr would.
+    from pydantic.networks import validate_email
+
+    return validate_email(value)[1]
+
+
+# Same validation, normalisation and JSON schema as pydantic's EmailStr.
+EmailStr = Annotated[
+    str,
+    AfterValidator(_validate_email),
+    WithJsonSchema({"type": "string", "format": "email"}),
+]
 
 
 class DocumentMeta(BaseModel):
@@ -68,3 +84,19 @@ class Resume(BaseModel):
     experience: List[ExperienceEntry] = []
     projects: List[ProjectEntry] = []
     technologies_section: Technologies
+
+
+class Layout(BaseModel):
+    """
+    Layout knobs of the templates; the defaults are the classic look.
+    """
+
+    font_size: float = 10  # pt
+    margin: float = 2.0  # cm, on every side
+    section_top_space: float = 0.3  # cm
+    section_bottom_space: float = 0.2  # cm
+    item_spacing: float = 0.10  # cm, around and between highlights
+
+    @property
+    def baseline_skip(self) -> float:
+        return round(self.font_size * 1.2, 2)
@@ -1,4 +1,12 @@
-from .tex import render_tex
-from .pdf import compile_pdf
+from .tex import get_environment, precompile_templates, render_tex, render_tex_string
+from .pdf import compile_pdf, compile_pdf_async, compile_pdf_bytes_async
 from .validation import validate_resume_model
-from .storage import get_storage_client, upload_to_bucket
+from .storage import (
+    get_bucket,
+    get_storage_client,
+    upload_bytes_to_bucket,
+    upload_bytes_to_bucket_async,
+    upload_to_bucket,
+    upload_to_bucket_async,
+)
+from .cache import PdfCache, pdf_cache, resume_cache_key
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from decouple import config
+
+from .scheduler import CompileScheduler, compile_scheduler
+
+
+# 0 picks a default derived from the compile scheduler's worker count.
+MAX_CONCURRENT_GENERATIONS = config("MAX_CONCURRENT_GENERATIONS", default=0, cast=int)
+ADMISSION_QUEUE_THRESHOLD = config("ADMISSION_QUEUE_THRESHOLD", default=0, cast=int)
+
+
+class ServerBusy(RuntimeError):
+    pass
+
+
+class AdmissionController:
+    """
+    Rejects new generations up front once `max_in_flight` are already being
+    built or `queue_threshold` compiles are waiting for a worker, so that
+    overload turns into fast retryable errors instead of a growing backlog.
+    """
+
+    def __init__(
+        self,
+        scheduler: CompileScheduler,
+        max_in_flight: Optional[int] = None,
+        queue_threshold: Optional[int] = None,
+    ):
+        self.scheduler = scheduler
+        self.max_in_flight = max_in_flight or 2 * scheduler.workers
+        self.queue_threshold = queue_threshold or scheduler.workers
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def saturated(self) -> bool:
+        return (
+            self.in_flight >= self.max_in_flight
+            or self.scheduler.stats()["queued"] >= self.queue_threshold
+        )
+
+    @contextmanager
+    def admit(self) -> Iterator[None]:
+        with self._lock:
+            if self.saturated():
+                self.rejected += 1
+                raise ServerBusy("Server busy, please retry in a few seconds")
+            self.in_flight += 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "queue_threshold": self.queue_threshold,
+                "rejected": self.rejected,
+                "saturated": self.saturated(),
+            }
+
+
+admission = AdmissionController(
+    compile_scheduler,
+    max_in_flight=MAX_CONCURRENT_GENERATIONS or None,
+    queue_threshold=ADMISSION_QUEUE_THRESHOLD or None,
+)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from decouple import config
+
+from src.models import Resume
+
+
+PDF_CACHE_DIR = Path(config("PDF_CACHE_DIR", default="/tmp/cvmaker-cache"))
+PDF_CACHE_SIZE = config("PDF_CACHE_SIZE", default=1024, cast=int)
+
+# Shape of `resume_cache_key` values, which also name blobs and drafts.
+_KEY_RE = re.compile(r"^[0-9a-f]{32}$")
+
+_template_digests: Dict[Path, Tuple[int, int, str]] = {}
+
+
+def _template_digest(template_path: Path) -> str:
+    st = template_path.stat()
+    cached = _template_digests.get(template_path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    digest = hashlib.sha256(template_path.read_bytes()).hexdigest()
+    _template_digests[template_path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def resume_cache_key(
+    model: Resume,
+    template_name: str,
+    templates_dir: Path,
+    max_pages: Optional[int] = None,
+) -> str:
+    # A defaulted last_updated_text changes every month without the content
+    # changing, so it is only part of the key when the caller set it.
+    exclude = None
+    if "last_updated_text" not in model.meta.model_fields_set:
+        exclude = {"meta": {"last_updated_text"}}
+    payload = model.model_dump(mode="json", exclude=exclude)
+    canonical = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+
+    h = hashlib.sha256()
+    h.update(canonical.encode("utf-8"))
+    h.update(b"\0")
+    h.update(template_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(_template_digest(templates_dir / template_name).encode("ascii"))
+    if max_pages is not None:
+        # Fitted PDFs may differ from the plain one, keys without a page
+        # limit are left unchanged.
+        h.update(f"\0max_pages={max_pages}".encode("ascii"))
+
+    return h.hexdigest()[:32]
+
+
+def is_resume_key(value: str) -> bool:
+    return bool(_KEY_RE.match(value))
+
+
+class PdfCache:
+    """
+    LRU index of already published PDFs, keyed by `resume_cache_key`.
+
+    Entries are kept in memory and mirrored to a JSON file so that a
+    restarted process does not recompile resumes it already uploaded.
+    """
+
+    def __init__(self, index_path: Path, max_entries: int = 1024):
+        self.index_path = index_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            self._load()
+            url = self._entries.get(key)
+            if url is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return url
+
+    def peek(self, key: str) -> Optional[str]:
+        """
+        Like `get`, without counting a hit or a miss or refreshing the entry.
+        """
+        with self._lock:
+            self._load()
+            return self._entries.get(key)
+
+    def put(self, key: str, url: str) -> None:
+        with self._lock:
+            self._load()
+            self._entries[key] = url
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+
+        for key, url in data.get("entries", [])[-self.max_entries:]:
+            self._entries[key] = url
+
+    def _save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps({"version": 1, "entries": list(self._entries.items())}),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.index_path)
+
+
+pdf_cache = PdfCache(PDF_CACHE_DIR / "index.json", max_entries=PDF_CACHE_SIZE)
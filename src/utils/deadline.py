@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from decouple import config
+
+
+# Time budget of a single tool call, in seconds. 0 disables the deadline.
+REQUEST_TIMEOUT = config("REQUEST_TIMEOUT", default=120, cast=float)
+
+
+class DeadlineExceeded(RuntimeError):
+    pass
+
+
+# Absolute time.monotonic() value by which the current request must finish.
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Give the enclosed work at most `seconds` to finish. Deadlines nest: an
+    inner deadline never extends the one already in force. Like the tracer,
+    this travels through a context variable, so it reaches asyncio tasks and
+    `asyncio.to_thread` calls started inside the block.
+    """
+    if not seconds:
+        yield
+        return
+
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires = min(expires, current)
+
+    token = _deadline.set(expires)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left before the current deadline, or None without one.
+    """
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - time.monotonic()
+
+
+def budget(limit: Optional[float] = None) -> Optional[float]:
+    """
+    Time allowed for the next step: the smaller of `limit` and what is left
+    of the current deadline. Raises `DeadlineExceeded` once it has passed.
+    """
+    left = remaining()
+    if left is None:
+        return limit or None
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(left, limit) if limit else left
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from decouple import config
+
+from src.models import Resume
+
+from .cache import is_resume_key
+
+
+DRAFTS_DIR = Path(config("DRAFTS_DIR", default="/tmp/cvmaker-drafts"))
+DRAFTS_MAX = config("DRAFTS_MAX", default=1024, cast=int)
+
+
+class Draft:
+    def __init__(self, resume: Resume, max_pages: Optional[int] = None):
+        self.resume = resume
+        self.max_pages = max_pages
+
+
+class DraftStore:
+    """
+    Resumes already generated, keyed by the `base_name` their PDF was
+    published under, so that later edits can be sent as patches.
+
+    Recently used drafts are kept in memory and every draft is written to
+    `directory`, one JSON file each, so that drafts survive a restart. The
+    least recently used ones are dropped beyond `max_entries`.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        # None marks a draft known to exist on disk but not loaded yet.
+        self._entries: "OrderedDict[str, Optional[Draft]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def get(self, draft_id: str) -> Optional[Draft]:
+        if not is_resume_key(draft_id):
+            return None
+
+        with self._lock:
+            self._load()
+            if draft_id not in self._entries:
+                return None
+
+            draft = self._entries[draft_id]
+            if draft is None:
+                draft = self._read(draft_id)
+                if draft is None:
+                    del self._entries[draft_id]
+                    return None
+                self._entries[draft_id] = draft
+
+            self._entries.move_to_end(draft_id)
+            return draft
+
+    def put(self, draft_id: str, draft: Draft) -> None:
+        if not is_resume_key(draft_id):
+            raise ValueError(f"Invalid draft id: {draft_id!r}")
+
+        with self._lock:
+            self._load()
+            known = draft_id in self._entries
+            self._entries[draft_id] = draft
+            self._entries.move_to_end(draft_id)
+            if not known:
+                # Same id means same content, the file is already up to date.
+                self._write(draft_id, draft)
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._path(evicted).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries)}
+
+    def _path(self, draft_id: str) -> Path:
+        return self.directory / f"{draft_id}.json"
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+
+        try:
+            paths = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+
+        for path in paths[-self.max_entries:]:
+            if is_resume_key(path.stem):
+                self._entries[path.stem] = None
+
+    def _read(self, draft_id: str) -> Optional[Draft]:
+        try:
+            data = json.loads(self._path(draft_id).read_text(encoding="utf-8"))
+            return Draft(Resume.model_validate(data["resume"]), data.get("max_pages"))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, draft_id: str, draft: Draft) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(draft_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "version": 1,
+                    # Defaults are not stored, so that they stay defaults.
+                    "resume": draft.resume.model_dump(mode="json", exclude_unset=True),
+                    "max_pages": draft.max_pages,
+                }
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+
+
+draft_store = DraftStore(DRAFTS_DIR, max_entries=DRAFTS_MAX)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict
+
+# jinja2 is imported by the factories, when the first environment is created.
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+
+class EnvironmentRegistry:
+    """
+    One jinja2 environment per templates directory, created by `factory` on
+    first use and shared afterwards, so that compiled templates are cached
+    across renders.
+    """
+
+    def __init__(self, factory: Callable[[Path], Environment]):
+        self.factory = factory
+        self._environments: Dict[Path, Environment] = {}
+        self._lock = threading.Lock()
+
+    def get(self, templates_dir: Path) -> Environment:
+        key = Path(templates_dir).resolve()
+
+        env = self._environments.get(key)
+        if env is None:
+            with self._lock:
+                env = self._environments.get(key)
+                if env is None:
+                    env = self.factory(key)
+                    self._environments[key] = env
+
+        return env
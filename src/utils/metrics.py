@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from .cache import pdf_cache
+from .scheduler import compile_scheduler
+from .singleflight import single_flight
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ] + self._samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: one count per bucket, then +Inf, sum.
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {_format_value(count)}")
+                inf = _format_labels(self.labelnames, key, 'le="+Inf"')
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_bucket{inf} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_count{labels} {_format_value(series[-2])}")
+        return lines
+
+
+REQUESTS = Counter(
+    "cvmaker_requests_total", "Tool calls received.", ["tool"]
+)
+ERRORS = Counter(
+    "cvmaker_errors_total", "Failures by pipeline stage.", ["stage"]
+)
+IN_FLIGHT = Gauge(
+    "cvmaker_generations_in_flight", "Tool calls currently being processed."
+)
+STAGE_DURATION = Histogram(
+    "cvmaker_stage_duration_seconds", "Latency of each pipeline stage.", ["stage"]
+)
+PDF_SIZE = Histogram(
+    "cvmaker_pdf_size_bytes", "Size of the generated PDFs.", buckets=SIZE_BUCKETS
+)
+PDF_OPTIMIZE_BYTES = Counter(
+    "cvmaker_pdf_optimize_bytes_total",
+    "PDF bytes going in and out of the optimisation stage.",
+    ["direction"],
+)
+
+_METRICS: List[_Metric] = [
+    REQUESTS, ERRORS, IN_FLIGHT, STAGE_DURATION, PDF_SIZE, PDF_OPTIMIZE_BYTES
+]
+_collectors: List[Callable[[], List[str]]] = []
+
+
+def register_collector(collector: Callable[[], List[str]]) -> None:
+    """
+    Register a callable returning exposition lines computed at scrape time.
+    """
+    _collectors.append(collector)
+
+
+@contextmanager
+def track_request(tool: str) -> Iterator[None]:
+    REQUESTS.inc(tool=tool)
+    IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        IN_FLIGHT.dec()
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - started, stage=stage)
+
+
+def _sample_lines(name: str, documentation: str, kind: str, value: float) -> List[str]:
+    return [
+        f"# HELP {name} {documentation}",
+        f"# TYPE {name} {kind}",
+        f"{name} {_format_value(value)}",
+    ]
+
+
+def _child_cpu_lines() -> List[str]:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return [
+        "# HELP cvmaker_child_cpu_seconds_total CPU time of exited child processes (tectonic).",
+        "# TYPE cvmaker_child_cpu_seconds_total counter",
+        f'cvmaker_child_cpu_seconds_total{{mode="user"}} {_format_value(usage.ru_utime)}',
+        f'cvmaker_child_cpu_seconds_total{{mode="system"}} {_format_value(usage.ru_stime)}',
+    ]
+
+
+def _pipeline_lines() -> List[str]:
+    scheduler = compile_scheduler.stats()
+    cache = pdf_cache.stats()
+    flights = single_flight.stats()
+    return (
+        _sample_lines("cvmaker_compile_workers", "Tectonic worker slots.", "gauge", scheduler["workers"])
+        + _sample_lines("cvmaker_compiles_running", "Tectonic compiles running.", "gauge", scheduler["running"])
+        + _sample_lines("cvmaker_compiles_queued", "Tectonic compiles waiting for a worker.", "gauge", scheduler["queued"])
+        + _sample_lines("cvmaker_compiles_rejected_total", "Compiles rejected because the queue was full.", "counter", scheduler["rejected"])
+        + _sample_lines("cvmaker_pdf_cache_hits_total", "Requests served from the PDF cache.", "counter", cache["hits"])
+        + _sample_lines("cvmaker_pdf_cache_misses_total", "Requests that had to build a PDF.", "counter", cache["misses"])
+        + _sample_lines("cvmaker_generations_building", "Distinct resumes currently being built.", "gauge", flights["in_flight"])
+        + _sample_lines("cvmaker_compiles_saved_total", "Requests that awaited an identical build already in flight instead of compiling.", "counter", flights["coalesced"])
+    )
+
+
+register_collector(_child_cpu_lines)
+register_collector(_pipeline_lines)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
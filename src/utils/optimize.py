@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import io
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from decouple import config
+
+
+# Rewrite compiled PDFs with pikepdf (the `optimize` extra) before upload.
+PDF_OPTIMIZE = config("PDF_OPTIMIZE", default=False, cast=bool)
+# Linearisation lets browsers show the first page early but its hint tables
+# make the file a few percent larger, so it is a separate choice.
+PDF_LINEARIZE = config("PDF_LINEARIZE", default=False, cast=bool)
+
+_warned_missing = False
+
+
+def _import_pikepdf():
+    global _warned_missing
+
+    try:
+        import pikepdf
+    except ImportError:
+        if not _warned_missing:
+            logging.warning("PDF_OPTIMIZE is set but pikepdf is not installed, PDFs are left as is")
+            _warned_missing = True
+        return None
+
+    # Match xdvipdfmx, qpdf defaults to a faster but weaker level.
+    pikepdf.settings.set_flate_compression_level(9)
+    return pikepdf
+
+
+def _unsubset_fonts(pdf) -> int:
+    """
+    Count embedded fonts that are not subset. xdvipdfmx subsets every font
+    it embeds, marking them with a "ABCDEF+" name prefix; a full font here
+    means the template pulled one in some other way.
+    """
+    names = set()
+    for page in pdf.pages:
+        fonts = page.obj.get("/Resources", {}).get("/Font", {})
+        for font in fonts.values():
+            descendants = font.get("/DescendantFonts")
+            for f in list(descendants) if descendants is not None else [font]:
+                descriptor = f.get("/FontDescriptor")
+                if descriptor is None:
+                    continue
+                if not any(k in descriptor for k in ("/FontFile", "/FontFile2", "/FontFile3")):
+                    continue
+                names.add(str(f.get("/BaseFont", "")))
+
+    return sum(1 for name in names if not (len(name) > 8 and name[7] == "+"))
+
+
+def optimize_pdf_bytes(
+    data: bytes, linearize: bool = PDF_LINEARIZE
+) -> Tuple[bytes, Optional[Dict[str, int]]]:
+    """
+    Drop unused page resources, pack objects into compressed object streams
+    and recompress every stream. With `linearize`, the PDF is also
+    linearised so that browsers can show the first page before the download
+    completes; otherwise the input is kept when the rewrite is not smaller.
+
+    Returns the PDF and a summary with its size before and after, or the
+    input unchanged and None when pikepdf is missing or cannot read it.
+    """
+    pikepdf = _import_pikepdf()
+    if pikepdf is None:
+        return data, None
+
+    try:
+        with pikepdf.open(io.BytesIO(data)) as pdf:
+            unsubset = _unsubset_fonts(pdf)
+            pdf.remove_unreferenced_resources()
+
+            out = io.BytesIO()
+            pdf.save(
+                out,
+                compress_streams=True,
+                recompress_flate=True,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                linearize=linearize,
+            )
+    except Exception as e:
+        # An optional stage never fails a generation, the PDF is still valid.
+        logging.warning(f"PDF optimisation skipped: {e}")
+        return data, None
+
+    if unsubset:
+        logging.warning(f"PDF embeds {unsubset} font(s) without subsetting")
+
+    optimized = out.getvalue()
+    if not linearize and len(optimized) >= len(data):
+        optimized = data
+
+    return optimized, {
+        "bytes_before": len(data),
+        "bytes_after": len(optimized),
+        "unsubset_fonts": unsubset,
+    }
+
+
+def optimize_pdf(pdf_path: Path) -> Optional[Dict[str, int]]:
+    """
+    In-place variant of `optimize_pdf_bytes`.
+    """
+    original = pdf_path.read_bytes()
+    data, summary = optimize_pdf_bytes(original)
+    if data is not original:
+        tmp_path = pdf_path.with_suffix(".opt.pdf")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(pdf_path)
+    return summary
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List, Set, Tuple
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [
+        token.replace("~1", "/").replace("~0", "~")
+        for token in pointer[1:].split("/")
+    ]
+
+
+def _list_index(container: List[Any], token: str, pointer: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index {token!r} in {pointer!r}")
+
+    index = int(token)
+    limit = len(container) if allow_end else len(container) - 1
+    if index > limit:
+        raise JsonPatchError(f"Array index out of range in {pointer!r}")
+    return index
+
+
+def _child(container: Any, token: str, pointer: str) -> Any:
+    if isinstance(container, dict):
+        if token not in container:
+            raise JsonPatchError(f"Path not found: {pointer!r}")
+        return container[token]
+    if isinstance(container, list):
+        return container[_list_index(container, token, pointer, allow_end=False)]
+    raise JsonPatchError(f"Path not found: {pointer!r}")
+
+
+def _resolve(
+    document: Any, pointer: str, touched: Set[int]
+) -> Tuple[Any, str]:
+    """
+    Return the container holding the target of `pointer` and the target's
+    key. Every container walked through is recorded in `touched`.
+    """
+    tokens = _parse_pointer(pointer)
+    if not tokens:
+        raise JsonPatchError("Operations on the whole document are not supported")
+
+    container = document
+    for token in tokens[:-1]:
+        container = _child(container, token, pointer)
+        touched.add(id(container))
+    return container, tokens[-1]
+
+
+def _get(document: Any, pointer: str) -> Any:
+    value = document
+    for token in _parse_pointer(pointer):
+        value = _child(value, token, pointer)
+    return value
+
+
+def _remove(document: Any, pointer: str, touched: Set[int]) -> Any:
+    container, key = _resolve(document, pointer, touched)
+    if isinstance(container, list):
+        return container.pop(_list_index(container, key, pointer, allow_end=False))
+    if not isinstance(container, dict) or key not in container:
+        raise JsonPatchError(f"Path not found: {pointer!r}")
+    return container.pop(key)
+
+
+def _add(document: Any, pointer: str, value: Any, touched: Set[int]) -> None:
+    container, key = _resolve(document, pointer, touched)
+    if isinstance(container, list):
+        container.insert(_list_index(container, key, pointer, allow_end=True), value)
+    elif isinstance(container, dict):
+        container[key] = value
+    else:
+        raise JsonPatchError(f"Path not found: {pointer!r}")
+
+
+def apply_patch(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> Set[int]:
+    """
+    Apply RFC 6902 JSON Patch `operations` to `document` in place.
+
+    Returns the ids of the objects inside `document` that were modified or
+    walked through to reach a modified value, so that callers can tell
+    untouched sub-objects apart. Values added by the patch are new objects.
+    Replacing the root document is not supported.
+    """
+    touched: Set[int] = set()
+
+    for number, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise JsonPatchError(f"Operation {number} is not an object")
+
+        op = operation.get("op")
+        path = operation.get("path")
+        if not isinstance(path, str):
+            raise JsonPatchError(f"Operation {number} has no 'path'")
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {number} ({op}) has no 'value'")
+        if op in ("move", "copy") and not isinstance(operation.get("from"), str):
+            raise JsonPatchError(f"Operation {number} ({op}) has no 'from'")
+
+        if op == "add":
+            _add(document, path, copy.deepcopy(operation["value"]), touched)
+        elif op == "remove":
+            _remove(document, path, touched)
+        elif op == "replace":
+            _remove(document, path, touched)
+            _add(document, path, copy.deepcopy(operation["value"]), touched)
+        elif op == "move":
+            if path.startswith(operation["from"] + "/"):
+                raise JsonPatchError(f"Operation {number} moves a value into itself")
+            _add(document, path, _remove(document, operation["from"], touched), touched)
+        elif op == "copy":
+            _add(document, path, copy.deepcopy(_get(document, operation["from"])), touched)
+        elif op == "test":
+            if _get(document, path) != operation["value"]:
+                raise JsonPatchError(f"Test failed at {path!r}")
+        else:
+            raise JsonPatchError(f"Operation {number} has an unknown op {op!r}")
+
+    return touched
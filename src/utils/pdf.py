@@ -1,22 +1,158 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import re
+import resource
+import signal
 import stat
 import subprocess
+import tempfile
+import threading
 from pathlib import Path
 
+from decouple import config
+
+from .deadline import DeadlineExceeded, budget
+from .scheduler import CompileJob, compile_scheduler
+from .tracing import current_span
+from .workdirs import job_workdir
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 TECTONIC_BIN = PROJECT_ROOT / "bin" / "tectonic"
 
+TECTONIC_CACHE_DIR = config("TECTONIC_CACHE_DIR", default="/tmp/tectonic-cache")
+# Local bundle (directory or zip) or pinned bundle URL. Empty means the
+# default bundle of the tectonic binary.
+TECTONIC_BUNDLE = config("TECTONIC_BUNDLE", default="")
+TECTONIC_ONLY_CACHED = config("TECTONIC_ONLY_CACHED", default=False, cast=bool)
+
+# Wall-clock limit of one tectonic run, further capped by the request
+# deadline. CPU and address-space limits are applied to the child process
+# itself. 0 disables a limit.
+TECTONIC_TIMEOUT = config("TECTONIC_TIMEOUT", default=60, cast=float)
+TECTONIC_CPU_LIMIT = config("TECTONIC_CPU_LIMIT", default=60, cast=int)
+TECTONIC_MEMORY_LIMIT_MB = config("TECTONIC_MEMORY_LIMIT_MB", default=2048, cast=int)
+
+# Parent of the private job directories of in-memory and fitted compiles;
+# RAM-backed when possible. Swept along with the output directory.
+JOB_TMP_ROOT = (
+    Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+) / "cvmaker-jobs"
+
+STDIN_TEX = Path("-")
+
+# Set once a compile succeeded, i.e. the bundle cache holds what the
+# templates need.
+_tectonic_warm = threading.Event()
+
+_TEX_PASS_RE = re.compile(r"^note: (?:Running|Rerunning) TeX", re.MULTILINE)
+_DOWNLOAD_RE = re.compile(r"^note: downloading ", re.MULTILINE)
+_OVERFULL_RE = re.compile(r"^Overfull \\[hv]box", re.MULTILINE)
+_UNDERFULL_RE = re.compile(r"^Underfull \\[hv]box", re.MULTILINE)
+_PAGES_RE = re.compile(r"^Output written on .*?\((\d+) pages?", re.MULTILINE)
+
 
 def compile_pdf(
     output_tex_path: Path,
     output_pdf_path: Path,
     extra_tex_inputs: list[Path] | None = None,
-) -> None:
+) -> dict[str, int]:
+    """
+    Compile `output_tex_path` to `output_pdf_path` and return the
+    `parse_tectonic_output` summary of the run.
+    """
+    outdir = output_pdf_path.parent
+    with compile_scheduler.slot(output_tex_path.stem, timeout=budget()) as job:
+        stderr = _run_tectonic(
+            output_tex_path, outdir, extra_tex_inputs=extra_tex_inputs
+        )
+
+    summary = _record_compile(job, stderr, outdir / f"{output_tex_path.stem}.log")
+    _collect_pdf(output_tex_path, output_pdf_path)
+    return summary
+
+
+async def compile_pdf_async(
+    output_tex_path: Path,
+    output_pdf_path: Path,
+    extra_tex_inputs: list[Path] | None = None,
+) -> dict[str, int]:
     outdir = output_pdf_path.parent
-    _run_tectonic(output_tex_path, outdir, extra_tex_inputs=extra_tex_inputs)
+    async with compile_scheduler.async_slot(
+        output_tex_path.stem, timeout=budget()
+    ) as job:
+        stderr = await _run_tectonic_async(
+            output_tex_path, outdir, extra_tex_inputs=extra_tex_inputs
+        )
+
+    summary = _record_compile(job, stderr, outdir / f"{output_tex_path.stem}.log")
+    _collect_pdf(output_tex_path, output_pdf_path)
+    return summary
+
+
+async def compile_pdf_bytes_async(tex_source: str) -> bytes:
+    """
+    Compile TeX source passed over stdin and return the PDF bytes. The PDF
+    and log only ever live in a private job directory removed afterwards.
+    """
+    with job_workdir(JOB_TMP_ROOT, "tectonic") as outdir:
+        async with compile_scheduler.async_slot(outdir.name, timeout=budget()) as job:
+            stderr = await _run_tectonic_async(STDIN_TEX, outdir, stdin=tex_source)
 
+        _record_compile(job, stderr, outdir / "texput.log")
+        return _read_stdin_pdf(outdir)
+
+
+def parse_tectonic_output(stderr: str, log_text: str) -> dict[str, int]:
+    """
+    Summarise a tectonic run from its console notes and its TeX log.
+    """
+    summary = {
+        "tex_passes": len(_TEX_PASS_RE.findall(stderr)),
+        "bundle_files_fetched": len(_DOWNLOAD_RE.findall(stderr)),
+        "overfull_boxes": len(_OVERFULL_RE.findall(log_text)),
+        "underfull_boxes": len(_UNDERFULL_RE.findall(log_text)),
+    }
+
+    pages = _PAGES_RE.search(log_text)
+    if pages:
+        summary["pages"] = int(pages.group(1))
+
+    return summary
+
+
+def is_tectonic_warm() -> bool:
+    return _tectonic_warm.is_set()
+
+
+def _record_compile(job: CompileJob, stderr: str, log_path: Path) -> dict[str, int]:
+    _tectonic_warm.set()
+
+    try:
+        log_text = log_path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        log_text = ""
+    summary = parse_tectonic_output(stderr, log_text)
+
+    span = current_span()
+    if span is not None:
+        span.set_attributes(
+            {"queue_wait_s": job.wait_s, "tectonic_run_s": job.run_s, **summary}
+        )
+
+    return summary
+
+
+def _read_stdin_pdf(outdir: Path) -> bytes:
+    # Tectonic names documents read from stdin "texput".
+    pdf_path = outdir / "texput.pdf"
+    if not pdf_path.exists():
+        raise RuntimeError(f"No PDF file found: {pdf_path}")
+    return pdf_path.read_bytes()
+
+
+def _collect_pdf(output_tex_path: Path, output_pdf_path: Path) -> None:
     if not output_pdf_path.exists():
         possible = output_tex_path.with_suffix(".pdf")
         if possible.exists():
@@ -34,17 +170,15 @@ def _ensure_tectonic() -> None:
         TECTONIC_BIN.chmod(mode | stat.S_IEXEC)
 
 
-def _run_tectonic(
-    tex_path: Path, outdir: Path, extra_tex_inputs: list[Path] | None = None
-) -> None:
-    _ensure_tectonic()
-
+def _tectonic_env(
+    tex_dir: Path, extra_tex_inputs: list[Path] | None = None
+) -> dict[str, str]:
     env = os.environ.copy()
     texinputs_parts = []
     if extra_tex_inputs:
         texinputs_parts.extend([str(p) for p in extra_tex_inputs if p])
 
-    texinputs_parts.append(str(tex_path.parent))
+    texinputs_parts.append(str(tex_dir))
 
     existing = env.get("TEXINPUTS", "")
     if existing:
@@ -52,7 +186,7 @@ def _run_tectonic(
     else:
         env["TEXINPUTS"] = os.pathsep.join(texinputs_parts)
     
-    env["TECTONIC_CACHE_DIR"] = "/tmp/tectonic-cache"
+    env["TECTONIC_CACHE_DIR"] = TECTONIC_CACHE_DIR
     env["TMPDIR"] = "/tmp"
     env["TMP"] = "/tmp"
     env["TEMP"] = "/tmp"
@@ -67,31 +201,168 @@ def _run_tectonic(
     env["TEXMFSYSCONFIG"] = "/tmp/texmf-sysconfig"
     
     tex_dirs = [
-        "/tmp/tectonic-cache", "/tmp/cache", "/tmp/data",
+        TECTONIC_CACHE_DIR, "/tmp/cache", "/tmp/data",
         "/tmp/texmf", "/tmp/texmf-var", "/tmp/texmf-config",
         "/tmp/texmf-sysvar", "/tmp/texmf-sysconfig"
     ]
     for dir_path in tex_dirs:
         Path(dir_path).mkdir(parents=True, exist_ok=True)
 
-    outdir.mkdir(parents=True, exist_ok=True)
+    return env
+
 
+def _tectonic_command(tex_path: Path, outdir: Path) -> list[str]:
     cmd = [
         str(TECTONIC_BIN),
         "--keep-logs",
         "--synctex=0",
         "--untrusted",
-        "--outdir",
-        str(outdir),
-        str(tex_path),
     ]
 
+    if TECTONIC_BUNDLE.startswith(("http://", "https://")):
+        cmd.extend(["--web-bundle", TECTONIC_BUNDLE])
+    elif TECTONIC_BUNDLE:
+        cmd.extend(["--bundle", TECTONIC_BUNDLE])
+
+    if TECTONIC_ONLY_CACHED:
+        cmd.append("--only-cached")
+
+    cmd.extend(["--outdir", str(outdir), str(tex_path)])
+
+    return cmd
+
+
+def _limit_resources(pid: int) -> None:
+    # Applied from the parent right after the spawn: a preexec_fn would run
+    # Python in a child forked from a threaded process, which can deadlock.
+    try:
+        if TECTONIC_CPU_LIMIT:
+            resource.prlimit(
+                pid, resource.RLIMIT_CPU, (TECTONIC_CPU_LIMIT, TECTONIC_CPU_LIMIT + 1)
+            )
+        if TECTONIC_MEMORY_LIMIT_MB:
+            limit = TECTONIC_MEMORY_LIMIT_MB * 1024 * 1024
+            resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+    except ProcessLookupError:
+        # Already exited.
+        pass
+
+
+def _kill_process_group(pid: int) -> None:
+    # Tectonic runs in its own session, so this also reaps anything it spawned.
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _compile_timeout_error(tex_path: Path, timeout: float) -> DeadlineExceeded:
+    name = "stdin" if tex_path == STDIN_TEX else tex_path.name
+    return DeadlineExceeded(
+        f"Tectonic compilation of {name} killed after {timeout:.1f}s"
+    )
+
+
+def _compilation_error(
+    tex_path: Path, stdout: str, stderr: str, returncode: int = 1
+) -> str:
+    error_msg = f"Tectonic compilation failed for {tex_path}\n"
+    if returncode < 0:
+        error_msg += f"Killed by {signal.Signals(-returncode).name}, resource limit exceeded?\n"
+    if stdout:
+        error_msg += f"STDOUT:\n{stdout}\n"
+    if stderr:
+        error_msg += f"STDERR:\n{stderr}\n"
+    return error_msg
+
+
+def _run_tectonic(
+    tex_path: Path,
+    outdir: Path,
+    extra_tex_inputs: list[Path] | None = None,
+    stdin: str | None = None,
+) -> str:
+    _ensure_tectonic()
+
+    tex_dir = outdir if tex_path == STDIN_TEX else tex_path.parent
+    env = _tectonic_env(tex_dir, extra_tex_inputs=extra_tex_inputs)
+    outdir.mkdir(parents=True, exist_ok=True)
+    cmd = _tectonic_command(tex_path, outdir)
+    timeout = budget(TECTONIC_TIMEOUT)
+
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE if stdin is not None else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+        start_new_session=True,
+    )
+    try:
+        _limit_resources(proc.pid)
+        stdout, stderr = proc.communicate(stdin, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        _kill_process_group(proc.pid)
+        proc.communicate()
+        raise _compile_timeout_error(tex_path, timeout) from e
+    except BaseException:
+        _kill_process_group(proc.pid)
+        proc.wait()
+        raise
+
+    if proc.returncode != 0:
+        raise RuntimeError(
+            _compilation_error(tex_path, stdout, stderr, proc.returncode)
+        )
+
+    return stderr
+
+
+async def _run_tectonic_async(
+    tex_path: Path,
+    outdir: Path,
+    extra_tex_inputs: list[Path] | None = None,
+    stdin: str | None = None,
+) -> str:
+    _ensure_tectonic()
+
+    tex_dir = outdir if tex_path == STDIN_TEX else tex_path.parent
+    env = _tectonic_env(tex_dir, extra_tex_inputs=extra_tex_inputs)
+    outdir.mkdir(parents=True, exist_ok=True)
+    cmd = _tectonic_command(tex_path, outdir)
+    timeout = budget(TECTONIC_TIMEOUT)
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env,
+        start_new_session=True,
+    )
     try:
-        subprocess.run(cmd, check=True, capture_output=True, text=True, env=env)
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Tectonic compilation failed for {tex_path}\n"
-        if e.stdout:
-            error_msg += f"STDOUT:\n{e.stdout}\n"
-        if e.stderr:
-            error_msg += f"STDERR:\n{e.stderr}\n"
-        raise RuntimeError(error_msg) from e
+        _limit_resources(proc.pid)
+        stdout, stderr = await asyncio.wait_for(
+            proc.communicate(stdin.encode("utf-8") if stdin is not None else None),
+            timeout,
+        )
+    except asyncio.TimeoutError as e:
+        _kill_process_group(proc.pid)
+        await proc.wait()
+        raise _compile_timeout_error(tex_path, timeout) from e
+    except BaseException:
+        # The client went away, or the limits could not be applied: do not
+        # leave the compile running.
+        _kill_process_group(proc.pid)
+        await proc.wait()
+        raise
+
+    stdout_text = stdout.decode("utf-8", errors="replace")
+    stderr_text = stderr.decode("utf-8", errors="replace")
+    if proc.returncode != 0:
+        raise RuntimeError(
+            _compilation_error(tex_path, stdout_text, stderr_text, proc.returncode)
+        )
+
+    return stderr_text
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+from src.models import Layout, Resume
+from src.utils.environments import EnvironmentRegistry
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+
+def _create_environment(templates_dir: Path) -> Environment:
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    # Unlike the TeX environment, values are HTML-escaped and the default
+    # delimiters are used.
+    return Environment(
+        loader=FileSystemLoader(str(templates_dir)),
+        autoescape=select_autoescape(["html.j2"]),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        auto_reload=True,
+    )
+
+
+_environments = EnvironmentRegistry(_create_environment)
+
+
+def get_environment(templates_dir: Path) -> Environment:
+    return _environments.get(templates_dir)
+
+
+def preview_template_name(template_name: str) -> str:
+    """
+    Name of the HTML mirror of a TeX template, e.g. classic.html.j2 for
+    classic.tex.j2.
+    """
+    return template_name.replace(".tex.", ".html.")
+
+
+def render_html_string(
+    resume_data: Union[Resume, Dict[str, Any]],
+    template_name: str,
+    templates_dir: Path,
+    layout: Optional[Layout] = None,
+) -> str:
+    template = get_environment(templates_dir).get_template(
+        preview_template_name(template_name)
+    )
+    return template.render(resume=resume_data, layout=layout or Layout())
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+from decouple import config
+
+from .deadline import DeadlineExceeded
+
+
+TECTONIC_WORKERS = config("TECTONIC_WORKERS", default=0, cast=int)
+TECTONIC_QUEUE_DEPTH = config("TECTONIC_QUEUE_DEPTH", default=32, cast=int)
+
+
+class SchedulerFull(RuntimeError):
+    pass
+
+
+class CompileJob:
+    def __init__(self, label: str):
+        self.label = label
+        self.queued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def wait_s(self) -> float:
+        if self.started_at is None:
+            return time.perf_counter() - self.queued_at
+        return self.started_at - self.queued_at
+
+    @property
+    def run_s(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+
+class CompileScheduler:
+    """
+    Bounds the number of concurrent tectonic runs.
+
+    At most `workers` jobs run at once; further jobs wait in a FIFO queue of
+    at most `max_queue` entries and are rejected with `SchedulerFull` beyond
+    that, instead of piling up processes. A job given a `timeout` leaves the
+    queue with `DeadlineExceeded` if no worker frees up in time.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue: int = 32):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+        self._running = 0
+        self._waiters: Deque[Callable[[], None]] = deque()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, label: str = "", timeout: Optional[float] = None) -> Iterator[CompileJob]:
+        job = CompileJob(label)
+        self._acquire(timeout)
+        job.started_at = time.perf_counter()
+        try:
+            yield job
+        finally:
+            job.finished_at = time.perf_counter()
+            self._release(job)
+
+    @asynccontextmanager
+    async def async_slot(
+        self, label: str = "", timeout: Optional[float] = None
+    ) -> AsyncIterator[CompileJob]:
+        job = CompileJob(label)
+        await self._acquire_async(timeout)
+        job.started_at = time.perf_counter()
+        try:
+            yield job
+        finally:
+            job.finished_at = time.perf_counter()
+            self._release(job)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": len(self._waiters),
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": self.wait_seconds_total,
+                "run_seconds_total": self.run_seconds_total,
+            }
+
+    def _try_acquire(self) -> bool:
+        # Must be called with self._lock held.
+        if self._running < self.workers and not self._waiters:
+            self._running += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerFull(
+                f"Compile queue is full ({self.max_queue} jobs waiting)"
+            )
+        return False
+
+    def _acquire(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            if self._try_acquire():
+                return
+            event = threading.Event()
+            self._waiters.append(event.set)
+
+        # The releasing job hands its slot over directly, so _running is
+        # already accounted for when the event fires.
+        if event.wait(timeout):
+            return
+
+        with self._lock:
+            try:
+                self._waiters.remove(event.set)
+            except ValueError:
+                # The slot was handed to us just as the wait timed out.
+                return
+        raise DeadlineExceeded(f"Gave up waiting for a compile worker after {timeout:.1f}s")
+
+    async def _acquire_async(self, timeout: Optional[float] = None) -> None:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(_resolve, future)
+
+        with self._lock:
+            if self._try_acquire():
+                return
+            self._waiters.append(wake)
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            with self._lock:
+                try:
+                    self._waiters.remove(wake)
+                except ValueError:
+                    # The slot was handed to us while we were being cancelled.
+                    self._hand_over()
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceeded(
+                    f"Gave up waiting for a compile worker after {timeout:.1f}s"
+                ) from e
+            raise
+
+    def _release(self, job: CompileJob) -> None:
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds_total += job.wait_s
+            self.run_seconds_total += job.run_s
+            self._hand_over()
+
+        logging.info(
+            f"Compile job {job.label or '-'} waited {job.wait_s:.3f}s, ran {job.run_s:.3f}s"
+        )
+
+    def _hand_over(self) -> None:
+        # Must be called with self._lock held.
+        if self._waiters:
+            self._waiters.popleft()()
+        else:
+            self._running -= 1
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+compile_scheduler = CompileScheduler(
+    workers=TECTONIC_WORKERS or None, max_queue=TECTONIC_QUEUE_DEPTH
+)
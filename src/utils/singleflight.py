@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .deadline import DeadlineExceeded, budget
+
+
+T = TypeVar("T")
+
+
+def _retrieve(waiter: asyncio.Future) -> None:
+    # The error is raised to the caller, or to the leader when the caller
+    # gave up; keep asyncio from logging it as never retrieved.
+    if not waiter.cancelled():
+        waiter.exception()
+
+
+class SingleFlight:
+    """
+    Registry of the generations currently being built, keyed by
+    `resume_cache_key`.
+
+    The first caller for a key runs the job; callers arriving with the same
+    key while it runs wait for its result instead of compiling and uploading
+    the same PDF again. Errors are shared the same way. If the job is
+    cancelled, one of the waiting callers takes over. Waiting callers keep
+    their own deadline.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: str) -> Tuple[concurrent.futures.Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+
+            future = self._calls[key] = concurrent.futures.Future()
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    async def do_async(
+        self, key: str, fn: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        """
+        Run `fn` unless a call with the same `key` is already in flight, in
+        which case its result is awaited. Returns the result and whether it
+        was shared from another call.
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return await self._lead_async(key, future, fn), False
+
+            # asyncio.wait never cancels what it waits on, so a caller giving
+            # up does not cancel the job for the others.
+            waiter = asyncio.wrap_future(future)
+            waiter.add_done_callback(_retrieve)
+            done, _ = await asyncio.wait([waiter], timeout=budget())
+            if not done:
+                raise DeadlineExceeded("Timed out waiting for an identical generation")
+            if not waiter.cancelled():
+                return waiter.result(), True
+
+    async def _lead_async(
+        self, key: str, future: concurrent.futures.Future, fn: Callable[[], Awaitable[T]]
+    ) -> T:
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    def _settle(
+        self,
+        key: str,
+        future: concurrent.futures.Future,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        self._finish(key, future)
+        if isinstance(error, (asyncio.CancelledError, KeyboardInterrupt, SystemExit)):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+
+single_flight = SingleFlight()
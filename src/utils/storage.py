@@ -1,25 +1,351 @@
+from __future__ import annotations
+
 import os, json, base64
-from google.cloud import storage
+import asyncio
+import logging
+import shutil
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+from urllib.parse import quote
+
 from decouple import config
 
+# google-cloud-storage and its auth stack take a large share of the cold
+# start, so they are imported on first upload instead of at server start.
+if TYPE_CHECKING:
+    from google.api_core.retry import Retry
+    from google.cloud import storage
+
 
 BUCKET_NAME = "cvmaker_files"
+PUBLIC_HOST = "https://storage.googleapis.com"
 
+GCS_POOL_SIZE = config("GCS_POOL_SIZE", default=16, cast=int)
+GCS_UPLOAD_TIMEOUT = config("GCS_UPLOAD_TIMEOUT", default=30.0, cast=float)
+GCS_UPLOAD_DEADLINE = config("GCS_UPLOAD_DEADLINE", default=60.0, cast=float)
+
+# "gcs" uploads to BUCKET_NAME, "local" keeps PDFs on disk and serves them
+# from this server.
+STORAGE_BACKEND = config("STORAGE_BACKEND", default="gcs")
+LOCAL_STORAGE_DIR = Path(config("LOCAL_STORAGE_DIR", default="/tmp/cvmaker-files"))
+# Seconds a local PDF is served after its last upload. 0 keeps them forever.
+LOCAL_STORAGE_TTL = config("LOCAL_STORAGE_TTL", default=7 * 24 * 3600, cast=float)
+PUBLIC_BASE_URL = config("PUBLIC_BASE_URL", default="http://localhost:3000")
+LOCAL_FILES_ROUTE = "/files"
+# Expired local files are deleted this often, and by uploads at most this
+# often.
+LOCAL_SWEEP_INTERVAL = 60.0
+
+_client: Optional[storage.Client] = None
+_buckets: Dict[str, storage.Bucket] = {}
+_client_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _upload_retry() -> Retry:
+    from google.cloud.storage.retry import DEFAULT_RETRY
+
+    # Blob names are content hashes, so re-sending an upload is idempotent
+    # and safe to retry unconditionally. The back-off is fully jittered by
+    # api_core.
+    return DEFAULT_RETRY.with_delay(
+        initial=0.5, maximum=8.0, multiplier=2.0
+    ).with_timeout(GCS_UPLOAD_DEADLINE)
+
+
+def _build_storage_client() -> storage.Client:
+    from google.auth.transport.requests import AuthorizedSession
+    from google.cloud import storage
+    from google.oauth2 import service_account
+    from requests.adapters import HTTPAdapter
 
-def get_storage_client() -> storage.Client:
     creds_json = base64.b64decode(config("GCP_CREDENTIALS")).decode("utf-8")
     creds_dict = json.loads(creds_json)
 
-    client = storage.Client.from_service_account_info(creds_dict)
+    credentials = service_account.Credentials.from_service_account_info(
+        creds_dict, scopes=storage.Client.SCOPE
+    )
+
+    # AuthorizedSession refreshes the access token when it expires and keeps
+    # TLS connections alive between uploads.
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=GCS_POOL_SIZE, pool_maxsize=GCS_POOL_SIZE)
+    session.mount("https://", adapter)
+
+    return storage.Client(
+        project=creds_dict.get("project_id"),
+        credentials=credentials,
+        _http=session,
+    )
+
+
+def get_storage_client() -> storage.Client:
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_storage_client()
+
+    return _client
+
+
+def get_bucket(bucket_name: str = BUCKET_NAME) -> storage.Bucket:
+    bucket = _buckets.get(bucket_name)
+    if bucket is None:
+        bucket = get_storage_client().bucket(bucket_name)
+        _buckets[bucket_name] = bucket
+
+    return bucket
+
+
+class StorageBackend:
+    """
+    Where published PDFs are stored and served from.
+
+    Blob names are content hashes, so writing a name again is idempotent.
+    `expires` tells whether a stored blob may disappear on its own, in which
+    case callers must not trust URLs they remembered.
+    """
+
+    expires = False
+
+    def upload_file(self, file_path: Path, blob_name: str) -> str:
+        raise NotImplementedError
+
+    def upload_bytes(self, data: bytes, blob_name: str) -> str:
+        raise NotImplementedError
+
+    def public_url(self, blob_name: str) -> str:
+        raise NotImplementedError
+
+    def exists(self, blob_name: str) -> bool:
+        raise NotImplementedError
+
+    def start(self) -> Optional[threading.Thread]:
+        """
+        Start the background housekeeping of the backend, if any.
+        """
+        return None
+
+
+class GcsBackend(StorageBackend):
+    def __init__(self, bucket_name: str = BUCKET_NAME):
+        self.bucket_name = bucket_name
+
+    def upload_file(self, file_path: Path, blob_name: str) -> str:
+        blob = get_bucket(self.bucket_name).blob(blob_name)
+
+        blob.upload_from_filename(
+            str(file_path),
+            content_type="application/pdf",
+            timeout=GCS_UPLOAD_TIMEOUT,
+            retry=_upload_retry(),
+        )
+
+        return blob.public_url
+
+    def upload_bytes(self, data: bytes, blob_name: str) -> str:
+        blob = get_bucket(self.bucket_name).blob(blob_name)
+
+        blob.upload_from_string(
+            data,
+            content_type="application/pdf",
+            timeout=GCS_UPLOAD_TIMEOUT,
+            retry=_upload_retry(),
+        )
+
+        return blob.public_url
+
+    def public_url(self, blob_name: str) -> str:
+        # Same as `Blob.public_url`, without creating a client.
+        return f"{PUBLIC_HOST}/{self.bucket_name}/{quote(blob_name, safe='/~')}"
 
-    return client
+    def exists(self, blob_name: str) -> bool:
+        blob = get_bucket(self.bucket_name).blob(blob_name)
+        return blob.exists(timeout=GCS_UPLOAD_TIMEOUT)
+
+
+class LocalBackend(StorageBackend):
+    """
+    Keeps PDFs in `directory`, to be served by this server under `base_url`
+    (see the /files route), which removes the upload hop.
+
+    Files are no longer served `ttl` seconds after their last upload and are
+    deleted by the next sweep of the directory, run by `start` and by
+    uploads.
+    """
+
+    def __init__(self, directory: Path, base_url: str, ttl: float = 0):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.expires = bool(ttl)
+        self._last_sweep = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def path(self, blob_name: str) -> Optional[Path]:
+        # Names come from request paths here, keep them inside the directory.
+        if not blob_name or "/" in blob_name or "\\" in blob_name or blob_name.startswith("."):
+            return None
+        return self.directory / blob_name
+
+    def stat(self, blob_name: str) -> Optional[os.stat_result]:
+        """
+        Stat of a blob still being served, None when missing or expired.
+        """
+        path = self.path(blob_name)
+        if path is None:
+            return None
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        if self.ttl and time.time() - st.st_mtime > self.ttl:
+            return None
+        return st
+
+    def upload_file(self, file_path: Path, blob_name: str) -> str:
+        def write(tmp_path: Path) -> None:
+            # Hard link when the output directory is on the same filesystem,
+            # so that the PDF is never copied.
+            try:
+                os.link(file_path, tmp_path)
+            except OSError:
+                shutil.copyfile(file_path, tmp_path)
+
+        return self._store(blob_name, write)
+
+    def upload_bytes(self, data: bytes, blob_name: str) -> str:
+        return self._store(blob_name, lambda tmp_path: tmp_path.write_bytes(data))
+
+    def public_url(self, blob_name: str) -> str:
+        return f"{self.base_url}/{quote(blob_name)}"
+
+    def exists(self, blob_name: str) -> bool:
+        return self.stat(blob_name) is not None
+
+    def evict_expired(self) -> int:
+        if not self.ttl:
+            return 0
+
+        removed = 0
+        deadline = time.time() - self.ttl
+        for path in self.directory.glob("*.pdf"):
+            try:
+                if path.stat().st_mtime < deadline:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+
+        return removed
+
+    def _store(self, blob_name: str, write: Callable[[Path], None]) -> str:
+        path = self.path(blob_name)
+        if path is None:
+            raise ValueError(f"Invalid blob name: {blob_name!r}")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            write(tmp_path)
+            # Replacing the file also restarts its TTL.
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self._sweep()
+        return self.public_url(blob_name)
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep < LOCAL_SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+
+        removed = self.evict_expired()
+        if removed:
+            logging.info(f"Deleted {removed} expired PDFs from {self.directory}")
+
+    def start(self) -> Optional[threading.Thread]:
+        """
+        Sweep every LOCAL_SWEEP_INTERVAL seconds in a daemon thread, so that
+        expired files are deleted on a server that gets no uploads.
+        """
+        if not self.ttl:
+            return None
+
+        def run() -> None:
+            while True:
+                try:
+                    self._sweep()
+                except Exception:
+                    logging.exception(f"Sweeping {self.directory} failed")
+                time.sleep(LOCAL_SWEEP_INTERVAL)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, name="local-storage-sweeper", daemon=True)
+            self._thread.start()
+        return self._thread
+
+
+def _create_backend(name: str) -> StorageBackend:
+    if name == "gcs":
+        return GcsBackend()
+    if name == "local":
+        return LocalBackend(
+            LOCAL_STORAGE_DIR,
+            base_url=f"{PUBLIC_BASE_URL.rstrip('/')}{LOCAL_FILES_ROUTE}",
+            ttl=LOCAL_STORAGE_TTL,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND {name!r}, expected 'gcs' or 'local'")
+
+
+storage_backend = _create_backend(STORAGE_BACKEND)
+
+
+def public_url(blob_name: str) -> str:
+    """
+    URL a blob is served at, known before it is uploaded.
+    """
+    return storage_backend.public_url(blob_name)
+
+
+def blob_exists(blob_name: str) -> bool:
+    return storage_backend.exists(blob_name)
+
+
+def blobs_expire() -> bool:
+    return storage_backend.expires
+
+
+async def blob_exists_async(blob_name: str) -> bool:
+    return await asyncio.to_thread(blob_exists, blob_name)
 
 
 def upload_to_bucket(file_path: str, destination_blob_name: str) -> str:
-    client = get_storage_client()
-    bucket = client.bucket(BUCKET_NAME)
-    blob = bucket.blob(destination_blob_name)
+    return storage_backend.upload_file(Path(file_path), destination_blob_name)
+
+
+async def upload_to_bucket_async(file_path: str, destination_blob_name: str) -> str:
+    # google-cloud-storage has no asyncio API; keep its blocking I/O off the
+    # event loop.
+    return await asyncio.to_thread(
+        upload_to_bucket, file_path=file_path, destination_blob_name=destination_blob_name
+    )
+
+
+def upload_bytes_to_bucket(data: bytes, destination_blob_name: str) -> str:
+    return storage_backend.upload_bytes(data, destination_blob_name)
 
-    blob.upload_from_filename(file_path, content_type="application/pdf")
 
-    return blob.public_url
+async def upload_bytes_to_bucket_async(data: bytes, destination_blob_name: str) -> str:
+    return await asyncio.to_thread(
+        upload_bytes_to_bucket, data=data, destination_blob_name=destination_blob_name
+    )
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import re
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+from decouple import config
 
+from src.models import Layout, Resume
+from src.utils.environments import EnvironmentRegistry
 
-def escape_latex(text: str) -> str:
-    if not isinstance(text, str):
-        return text
+# jinja2 is imported when the first environment is created, not at startup.
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+# Directory of templates precompiled with `precompile_templates`. When set,
+# precompiled modules take precedence over the template sources.
+JINJA_COMPILED_DIR = config("JINJA_COMPILED_DIR", default="")
+
+
+_LATEX_SPECIALS = re.compile(r"[\\{}&%$#^_~]")
 
-    text = text.replace("\\", r"\textbackslash{}")
+
+def _escape_latex_chunk(text: str) -> str:
     text = text.replace("{", r"\{")
     text = text.replace("}", r"\}")
     text = text.replace("&", r"\&")
@@ -23,39 +34,83 @@ def escape_latex(text: str) -> str:
     return text
 
 
-def escape_latex_recursive(data: Any) -> Any:
-    if isinstance(data, str):
-        return escape_latex(data)
-    elif isinstance(data, dict):
-        return {key: escape_latex_recursive(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [escape_latex_recursive(item) for item in data]
-    else:
-        return data
+def escape_latex(text: str) -> str:
+    if not isinstance(text, str) or not _LATEX_SPECIALS.search(text):
+        return text
 
+    # Backslashes are split out first so that the braces of the
+    # \textbackslash{} replacement are not escaped again.
+    if "\\" in text:
+        return r"\textbackslash{}".join(
+            _escape_latex_chunk(chunk) for chunk in text.split("\\")
+        )
 
-def render_tex(
-    resume_data: Dict[str, Any],
-    output_tex_path: Path,
-    template_name: str,
-    templates_dir: Path,
-) -> None:
-    escaped_data = escape_latex_recursive(resume_data)
+    return _escape_latex_chunk(text)
 
-    env = Environment(
-        loader=FileSystemLoader(str(templates_dir)),
+
+def _create_environment(templates_dir: Path) -> Environment:
+    from jinja2 import ChoiceLoader, Environment, FileSystemLoader, ModuleLoader
+
+    loader = FileSystemLoader(str(templates_dir))
+    if JINJA_COMPILED_DIR:
+        loader = ChoiceLoader([ModuleLoader(JINJA_COMPILED_DIR), loader])
+
+    # auto_reload makes get_template recompile a cached template only when
+    # the source file's mtime changed.
+    # Strings are escaped by `finalize` as they are written out, so the
+    # resume never needs to be copied into an escaped dict beforehand.
+    return Environment(
+        loader=loader,
         autoescape=False,
+        finalize=escape_latex,
         trim_blocks=True,
         lstrip_blocks=True,
+        auto_reload=True,
+        block_start_string="<<%",
+        block_end_string="%>>",
+        variable_start_string="<<",
+        variable_end_string=">>",
+        comment_start_string="<#!",
+        comment_end_string="!#>",
+    )
+
+
+_environments = EnvironmentRegistry(_create_environment)
+
+
+def get_environment(templates_dir: Path) -> Environment:
+    return _environments.get(templates_dir)
+
+
+def precompile_templates(templates_dir: Path, target_dir: Path) -> None:
+    env = _create_environment(Path(templates_dir))
+    # Only the TeX templates; the HTML previews use their own environment.
+    env.compile_templates(
+        str(target_dir),
+        filter_func=lambda name: name.endswith(".tex.j2"),
+        zip=None,
+        ignore_errors=False,
     )
-    env.block_start_string = "<<%"
-    env.block_end_string = "%>>"
-    env.variable_start_string = "<<"
-    env.variable_end_string = ">>"
-    env.comment_start_string = "<#!"
-    env.comment_end_string = "!#>"
-    template = env.get_template(template_name)
-    rendered = template.render(resume=escaped_data)
+
+
+def render_tex_string(
+    resume_data: Union[Resume, Dict[str, Any]],
+    template_name: str,
+    templates_dir: Path,
+    layout: Optional[Layout] = None,
+) -> str:
+    template = get_environment(templates_dir).get_template(template_name)
+    return template.render(resume=resume_data, layout=layout or Layout())
+
+
+def render_tex(
+    resume_data: Union[Resume, Dict[str, Any]],
+    output_tex_path: Path,
+    template_name: str,
+    templates_dir: Path,
+    layout: Optional[Layout] = None,
+) -> None:
+    rendered = render_tex_string(resume_data, template_name, templates_dir, layout)
 
     output_tex_path.parent.mkdir(parents=True, exist_ok=True)
     output_tex_path.write_text(rendered, encoding="utf-8")
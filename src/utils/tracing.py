@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from decouple import config
+
+
+# JSONL file receiving finished spans. Empty disables tracing.
+TRACE_FILE = config("TRACE_FILE", default="")
+# Size at which the file is rotated to TRACE_FILE.1. 0 disables rotation.
+TRACE_MAX_BYTES = config("TRACE_MAX_BYTES", default=16 * 1024 * 1024, cast=int)
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.duration_s: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.attributes: Dict[str, Any] = {}
+        self._started = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.duration_s = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_s": self.duration_s,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class NullExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        pass
+
+
+class JsonlExporter(SpanExporter):
+    """
+    Appends spans to `path`, one JSON object per line, through a single
+    open handle. Once the file would exceed `max_bytes`, it is renamed with a
+    ".1" suffix, replacing the previous one, and a new file is started.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file: Optional[TextIO] = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> TextIO:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8", buffering=1)
+            self._size = self._file.tell()
+        return self._file
+
+    def _rotate(self) -> None:
+        self.close()
+        os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        size = len(line.encode("utf-8"))
+        with self._lock:
+            try:
+                f = self._open()
+                if self.max_bytes and self._size and self._size + size > self.max_bytes:
+                    self._rotate()
+                    f = self._open()
+                f.write(line)
+                self._size += size
+            except OSError as e:
+                logging.warning(f"Could not export span {span.name}: {e}")
+                self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Minimal tracer: spans nest through a context variable, so children
+    created in asyncio tasks or `asyncio.to_thread` calls attach to the span
+    that was current when they were started. Each finished span is handed to
+    the exporter.
+    """
+
+    def __init__(self, exporter: SpanExporter):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            parent_id=parent.span_id if parent else None,
+        )
+        span.set_attributes(attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+            self.exporter.export(span)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+tracer = Tracer(
+    JsonlExporter(Path(TRACE_FILE), max_bytes=TRACE_MAX_BYTES)
+    if TRACE_FILE
+    else NullExporter()
+)
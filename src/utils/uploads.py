@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from decouple import config
+
+from .metrics import register_collector, track_stage
+from .storage import public_url
+
+
+# Return the PDF URL as soon as the PDF is built and upload it afterwards.
+BACKGROUND_UPLOADS = config("BACKGROUND_UPLOADS", default=False, cast=bool)
+UPLOAD_WORKERS = config("UPLOAD_WORKERS", default=4, cast=int)
+UPLOAD_ATTEMPTS = config("UPLOAD_ATTEMPTS", default=3, cast=int)
+UPLOAD_RETRY_DELAY = 2.0
+
+PENDING = "pending"
+LIVE = "live"
+FAILED = "failed"
+
+
+class Upload:
+    def __init__(self, blob_name: str, url: str):
+        self.blob_name = blob_name
+        self.url = url
+        self.state = PENDING
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.queued_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.state,
+            "url": self.url,
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+class UploadQueue:
+    """
+    Uploads PDFs on background threads so that callers get the public URL,
+    which only depends on the blob name, before the object is live.
+
+    Each upload is attempted up to `attempts` times, on top of the retries
+    the storage client already does within one attempt. The state of the
+    last `max_entries` uploads is kept for `resume_status`.
+    """
+
+    def __init__(self, workers: int = 4, attempts: int = 3, max_entries: int = 1024):
+        self.workers = workers
+        self.attempts = max(attempts, 1)
+        self.max_entries = max_entries
+        self.failed = 0
+        self._uploads: "OrderedDict[str, Upload]" = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        blob_name: str,
+        upload: Callable[[], str],
+        on_live: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Queue `upload`, a call uploading `blob_name` and returning its URL,
+        and return the URL right away. `on_live` is called with the URL once
+        the upload succeeded. A blob already being uploaded is not queued
+        again.
+        """
+        with self._lock:
+            current = self._uploads.get(blob_name)
+            if current is not None and current.state == PENDING:
+                return current.url
+
+            entry = self._uploads[blob_name] = Upload(blob_name, public_url(blob_name))
+            self._uploads.move_to_end(blob_name)
+            self._evict()
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="upload"
+                )
+            self._executor.submit(self._run, entry, upload, on_live)
+
+        return entry.url
+
+    def url_for(self, blob_name: str) -> Optional[str]:
+        """
+        URL of `blob_name` while it is being uploaded. Once live, the PDF
+        cache knows about it.
+        """
+        with self._lock:
+            entry = self._uploads.get(blob_name)
+            if entry is None or entry.state != PENDING:
+                return None
+            return entry.url
+
+    def get(self, blob_name: str) -> Optional[Upload]:
+        with self._lock:
+            return self._uploads.get(blob_name)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = sum(1 for u in self._uploads.values() if u.state == PENDING)
+            return {"pending": pending, "failed": self.failed}
+
+    def _run(
+        self,
+        entry: Upload,
+        upload: Callable[[], str],
+        on_live: Optional[Callable[[str], None]],
+    ) -> None:
+        for attempt in range(1, self.attempts + 1):
+            entry.attempts = attempt
+            try:
+                with track_stage("upload"):
+                    entry.url = upload()
+                break
+            except Exception as e:
+                entry.error = str(e)
+                logging.warning(
+                    f"Upload of {entry.blob_name} failed (attempt {attempt}/{self.attempts}): {e}"
+                )
+                if attempt < self.attempts:
+                    time.sleep(UPLOAD_RETRY_DELAY * 2 ** (attempt - 1))
+        else:
+            with self._lock:
+                entry.state = FAILED
+                entry.finished_at = time.time()
+                self.failed += 1
+            return
+
+        with self._lock:
+            entry.state = LIVE
+            entry.error = None
+            entry.finished_at = time.time()
+
+        if on_live is not None:
+            try:
+                on_live(entry.url)
+            except Exception:
+                logging.exception(f"Failed to record the upload of {entry.blob_name}")
+
+    def _evict(self) -> None:
+        # Pending uploads are never dropped, their status is still awaited.
+        for blob_name in list(self._uploads):
+            if len(self._uploads) <= self.max_entries:
+                break
+            if self._uploads[blob_name].state != PENDING:
+                del self._uploads[blob_name]
+
+
+upload_queue = UploadQueue(workers=UPLOAD_WORKERS, attempts=UPLOAD_ATTEMPTS)
+
+
+def _upload_lines() -> List[str]:
+    stats = upload_queue.stats()
+    return [
+        "# HELP cvmaker_uploads_pending Background uploads not finished yet.",
+        "# TYPE cvmaker_uploads_pending gauge",
+        f"cvmaker_uploads_pending {stats['pending']}",
+        "# HELP cvmaker_uploads_failed_total Background uploads that failed every attempt.",
+        "# TYPE cvmaker_uploads_failed_total counter",
+        f"cvmaker_uploads_failed_total {stats['failed']}",
+    ]
+
+
+register_collector(_upload_lines)
@@ -1,4 +1,8 @@
-from typing import List, Optional
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import InitErrorDetails, PydanticCustomError
 
 from src.models import (
     Resume,
@@ -10,6 +14,7 @@ from src.models import (
     ProjectEntry,
     Technologies,
 )
+from src.utils.patch import apply_patch
 
 
 def validate_resume_model(
@@ -173,4 +178,331 @@ def validate_resume_model(
         "technologies_section": technologies_section,
     }
 
-    return Resume.model_validate(resume_data)
+    return sanitize_resume(Resume.model_validate(resume_data))
+
+
+# Built once: constructing a TypeAdapter compiles the validator and schema.
+_RESUME_ADAPTER = TypeAdapter(Resume)
+
+
+def _inline_refs(schema: Dict[str, Any]) -> Dict[str, Any]:
+    definitions = schema.pop("$defs", {})
+
+    def resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/$defs/"):
+                target = dict(definitions[ref[len("#/$defs/"):]])
+                target.update({k: v for k, v in node.items() if k != "$ref"})
+                return resolve(target)
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+
+# JSON schema of the nested resume document, self-contained so that it can
+# be embedded as the schema of a single tool argument.
+RESUME_JSON_SCHEMA = _inline_refs(_RESUME_ADAPTER.json_schema())
+
+
+def validate_resume_document(data: Dict[str, Any]) -> Resume:
+    """
+    Validate a nested resume document (the JSON form of `Resume`) in one
+    pass. Strings are sanitized on the raw input first, so that the model is
+    only built once.
+    """
+    errors: List[InitErrorDetails] = []
+    sanitized = _sanitize_value(data, (), errors)
+    if errors:
+        raise ValidationError.from_exception_data(Resume.__name__, errors)
+
+    return _RESUME_ADAPTER.validate_python(sanitized)
+
+
+def _char_range(first: str, last: str) -> str:
+    return "".join(chr(c) for c in range(ord(first), ord(last) + 1))
+
+
+# Characters the classic template can typeset: it loads the Type 1 build of
+# Source Sans Pro, whose T1 and TS1 encodings cover Latin-1, Latin
+# Extended-A and the usual typographic punctuation. Anything else comes out
+# as a missing glyph (or fails the compile), so it is mapped or rejected
+# before a compile is spent on it.
+GLYPH_COVERAGE = frozenset(
+    _char_range(" ", "~")
+    + _char_range("\u00a0", "\u00ff")
+    + _char_range("\u0100", "\u017f")
+    + "\u0192\u02c6\u02c7\u02d8\u02d9\u02da\u02db\u02dc\u02dd"
+    + "\u2013\u2014\u2018\u2019\u201a\u201c\u201d\u201e"
+    + "\u2020\u2021\u2022\u2026\u2030\u2032\u2033\u2039\u203a"
+    + "\u20ac\u2122"
+)
+
+# Common characters outside the coverage with a faithful stand-in.
+TRANSLITERATIONS = {
+    # Spaces and invisible formatting characters
+    **{c: " " for c in _char_range("\u2000", "\u200a") + "\u202f\u205f\u3000"},
+    **{c: "" for c in "\u200b\u200c\u200d\u2060\ufeff\ufe0f"},
+    "\t": " ",
+    "\n": " ",
+    "\r": " ",
+    # Dashes, quotes and primes
+    "\u2010": "-",
+    "\u2011": "-",
+    "\u2012": "-",
+    "\u2015": "\u2014",
+    "\u2212": "-",
+    "\u201b": "\u2019",
+    "\u201f": "\u201d",
+    "\u2035": "\u2032",
+    # Bullets and list markers
+    "\u2023": "\u2022",
+    "\u2043": "-",
+    "\u25aa": "\u2022",
+    "\u25cf": "\u2022",
+    "\u25e6": "\u2022",
+    "\u2219": "\u00b7",
+    # Arrows and comparison signs
+    "\u2190": "<-",
+    "\u2192": "->",
+    "\u2194": "<->",
+    "\u21d0": "<=",
+    "\u21d2": "=>",
+    "\u27f6": "->",
+    "\u2264": "<=",
+    "\u2265": ">=",
+    "\u2260": "!=",
+    "\u2248": "~",
+    "\u221e": "infinity",
+    # Symbols
+    "\u2605": "*",
+    "\u2606": "*",
+    "\u2713": "",
+    "\u2714": "",
+    "\u2116": "No.",
+    "\u20b9": "INR ",
+    "\u20bd": "RUB ",
+    "\u20a9": "KRW ",
+    "\u2153": "1/3",
+    "\u2154": "2/3",
+}
+
+
+def _transliterate(char: str) -> Optional[str]:
+    mapped = TRANSLITERATIONS.get(char)
+    if mapped is not None:
+        return mapped
+
+    # Compatibility forms and accented letters outside the coverage, e.g.
+    # ligatures, fullwidth Latin or Vietnamese vowels, keep their base
+    # letters.
+    decomposed = "".join(
+        c
+        for c in unicodedata.normalize("NFKD", char)
+        if not unicodedata.combining(c)
+    )
+    if decomposed and all(c in GLYPH_COVERAGE for c in decomposed):
+        return decomposed
+
+    return None
+
+
+def sanitize_text(text: str) -> Tuple[str, List[str]]:
+    """
+    Map `text` onto characters the template fonts can render. Returns the
+    mapped text and the characters that have no stand-in.
+    """
+    if text.isascii() and text.isprintable():
+        return text, []
+
+    text = unicodedata.normalize("NFC", text)
+    if all(c in GLYPH_COVERAGE for c in text):
+        return text, []
+
+    parts = []
+    unsupported = []
+    for char in text:
+        if char in GLYPH_COVERAGE:
+            parts.append(char)
+            continue
+
+        mapped = _transliterate(char)
+        if mapped is None:
+            if char not in unsupported:
+                unsupported.append(char)
+        else:
+            parts.append(mapped)
+
+    return "".join(parts), unsupported
+
+
+def _describe(char: str) -> str:
+    return f"'{char}' (U+{ord(char):04X} {unicodedata.name(char, 'unnamed')})"
+
+
+def _sanitize_value(
+    value: Any, loc: Tuple[Any, ...], errors: List[InitErrorDetails]
+) -> Any:
+    if isinstance(value, str):
+        text, unsupported = sanitize_text(value)
+        if unsupported:
+            errors.append(
+                {
+                    "type": PydanticCustomError(
+                        "unsupported_character",
+                        "Contains characters the resume font cannot render: "
+                        "{characters}. Remove them or use a Latin equivalent.",
+                        {"characters": ", ".join(_describe(c) for c in unsupported)},
+                    ),
+                    "loc": loc,
+                    "input": value,
+                }
+            )
+        return text
+    if isinstance(value, dict):
+        return {k: _sanitize_value(v, loc + (k,), errors) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_sanitize_value(v, loc + (i,), errors) for i, v in enumerate(value)]
+    return value
+
+
+def sanitize_resume(resume: Resume) -> Resume:
+    """
+    Check every string of `resume` against the glyph coverage of the
+    template fonts, before any compile is spent on it. Known characters are
+    mapped to a renderable equivalent; anything else is rejected with a
+    `ValidationError` pointing at the offending fields.
+    """
+    # Defaults are left out so that they stay defaults in the sanitized model.
+    data: Dict[str, Any] = resume.model_dump(exclude_unset=True)
+    errors: List[InitErrorDetails] = []
+    sanitized = _sanitize_value(data, (), errors)
+
+    if errors:
+        raise ValidationError.from_exception_data(Resume.__name__, errors)
+    if sanitized == data:
+        return resume
+
+    return Resume.model_validate(sanitized)
+
+
+# Sub-models of Resume that a patch can touch independently.
+_SECTION_MODELS: Dict[str, Type[BaseModel]] = {
+    "meta": DocumentMeta,
+    "header": Header,
+    "technologies_section": Technologies,
+}
+_ENTRY_MODELS: Dict[str, Type[BaseModel]] = {
+    "education": EducationEntry,
+    "experience": ExperienceEntry,
+    "projects": ProjectEntry,
+}
+_PARAGRAPHS = TypeAdapter(List[str])
+
+
+def _prefixed_errors(
+    error: ValidationError, loc: Tuple[Any, ...]
+) -> List[InitErrorDetails]:
+    return [
+        {
+            # Keep the original type and message, rendered already.
+            "type": PydanticCustomError(line["type"], line["msg"]),
+            "loc": loc + tuple(line["loc"]),
+            "input": line["input"],
+        }
+        for line in error.errors()
+    ]
+
+
+def patch_resume_model(resume: Resume, operations: List[Dict[str, Any]]) -> Resume:
+    """
+    Apply a JSON Patch to `resume` and return the patched model.
+
+    Only the sub-models the patch reaches into or replaces (one experience
+    entry, the header, ...) are sanitized and validated again; the others
+    are reused as they are. Raises `JsonPatchError` for a malformed patch
+    and `ValidationError`, located from the resume root, for invalid values.
+    """
+    document: Dict[str, Any] = {}
+    # Dumped values are kept alive next to their model: once the patch drops
+    # one, a value it creates could otherwise be given the same id.
+    originals: Dict[int, Tuple[Any, BaseModel]] = {}
+
+    for name in _SECTION_MODELS:
+        section = getattr(resume, name)
+        document[name] = section.model_dump(mode="json")
+        originals[id(document[name])] = (document[name], section)
+    for name in _ENTRY_MODELS:
+        document[name] = []
+        for entry in getattr(resume, name):
+            document[name].append(entry.model_dump(mode="json"))
+            originals[id(document[name][-1])] = (document[name][-1], entry)
+    original_intro = document["intro_paragraphs"] = list(resume.intro_paragraphs)
+
+    touched = apply_patch(document, operations)
+
+    # A defaulted last_updated_text the patch left alone stays a default,
+    # which keeps it out of `resume_cache_key`.
+    meta = document.get("meta")
+    if (
+        "last_updated_text" not in resume.meta.model_fields_set
+        and isinstance(meta, dict)
+        and meta.get("last_updated_text") == resume.meta.last_updated_text
+    ):
+        del meta["last_updated_text"]
+
+    if set(document) != set(Resume.model_fields):
+        # Whole sections were added or removed: fall back to a full pass.
+        errors: List[InitErrorDetails] = []
+        sanitized = _sanitize_value(document, (), errors)
+        if errors:
+            raise ValidationError.from_exception_data(Resume.__name__, errors)
+        return Resume.model_validate(sanitized)
+
+    def reuse(value: Any) -> Optional[BaseModel]:
+        original = originals.get(id(value))
+        if original is None or original[0] is not value or id(value) in touched:
+            return None
+        return original[1]
+
+    errors = []
+    fields: Dict[str, Any] = {}
+
+    def revalidate(model: Type[BaseModel], value: Any, loc: Tuple[Any, ...]) -> Any:
+        sanitized = _sanitize_value(value, loc, errors)
+        try:
+            return model.model_validate(sanitized)
+        except ValidationError as e:
+            errors.extend(_prefixed_errors(e, loc))
+
+    for name, model in _SECTION_MODELS.items():
+        value = document[name]
+        fields[name] = reuse(value) or revalidate(model, value, (name,))
+
+    for name, model in _ENTRY_MODELS.items():
+        entries = document[name]
+        if not isinstance(entries, list):
+            errors.append({"type": "list_type", "loc": (name,), "input": entries})
+            continue
+        fields[name] = [
+            reuse(value) or revalidate(model, value, (name, index))
+            for index, value in enumerate(entries)
+        ]
+
+    paragraphs = document["intro_paragraphs"]
+    if paragraphs is original_intro and id(original_intro) not in touched:
+        fields["intro_paragraphs"] = resume.intro_paragraphs
+    else:
+        paragraphs = _sanitize_value(paragraphs, ("intro_paragraphs",), errors)
+        try:
+            fields["intro_paragraphs"] = _PARAGRAPHS.validate_python(paragraphs)
+        except ValidationError as e:
+            errors.extend(_prefixed_errors(e, ("intro_paragraphs",)))
+
+    if errors:
+        raise ValidationError.from_exception_data(Resume.__name__, errors)
+
+    return Resume.model_construct(**fields)
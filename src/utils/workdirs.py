@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from decouple import config
+
+
+# Artifacts left in the output directories (crashed workers, older releases)
+# are deleted after OUTPUT_TTL seconds, oldest first beyond OUTPUT_MAX_BYTES.
+OUTPUT_TTL = config("OUTPUT_TTL", default=3600, cast=float)
+OUTPUT_MAX_BYTES = config("OUTPUT_MAX_BYTES", default=256 * 1024 * 1024, cast=int)
+OUTPUT_SWEEP_INTERVAL = config("OUTPUT_SWEEP_INTERVAL", default=60, cast=float)
+
+# Job directories in use, never swept. Job directories are created, and
+# leftovers deleted, under the lock so that a new job directory is never
+# mistaken for a leftover.
+_active: Set[Path] = set()
+_active_lock = threading.Lock()
+
+
+@contextmanager
+def job_workdir(root: Path, label: str = "job") -> Iterator[Path]:
+    """
+    Private directory under `root` for the .tex, .pdf and .log files of one
+    job, deleted with its content when the block exits, on errors too.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    with _active_lock:
+        workdir = Path(tempfile.mkdtemp(prefix=f"{label}-", dir=root))
+        _active.add(workdir)
+
+    try:
+        yield workdir
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        with _active_lock:
+            _active.discard(workdir)
+
+
+def _entry_usage(path: Path) -> Tuple[int, int, float]:
+    """
+    Files, bytes and latest modification time of a top-level entry.
+    """
+    try:
+        if not path.is_dir() or path.is_symlink():
+            st = path.lstat()
+            return 1, st.st_size, st.st_mtime
+
+        files, size, mtime = 0, 0, path.lstat().st_mtime
+        for child in path.rglob("*"):
+            st = child.lstat()
+            mtime = max(mtime, st.st_mtime)
+            if not child.is_dir():
+                files += 1
+                size += st.st_size
+        return files, size, mtime
+    except OSError:
+        # Deleted while walking, e.g. by the job owning it.
+        return 0, 0, 0.0
+
+
+class OutputSweeper:
+    """
+    Keeps the directories under `roots` bounded. Jobs clean up after
+    themselves with `job_workdir`; this removes whatever is left behind once
+    older than `ttl` seconds, then the oldest entries until at most
+    `max_bytes` remain across all roots. Directories of running jobs are
+    never touched.
+    """
+
+    def __init__(
+        self,
+        roots: Sequence[Path],
+        ttl: float = 3600,
+        max_bytes: int = 0,
+        interval: float = 60,
+    ):
+        self.roots = list(roots)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.removed = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def _entries(self) -> List[Tuple[Path, int, int, float]]:
+        paths: List[Path] = []
+        for root in self.roots:
+            try:
+                paths.extend(root.iterdir())
+            except OSError:
+                continue
+        return [(path, *_entry_usage(path)) for path in paths]
+
+    def usage(self) -> Dict[str, int]:
+        with _active_lock:
+            jobs = sum(1 for path in _active if path.parent in self.roots)
+
+        entries = self._entries()
+        return {
+            "jobs": jobs,
+            "artifacts": sum(files for _, files, _, _ in entries),
+            "bytes": sum(size for _, _, size, _ in entries),
+        }
+
+    def sweep(self) -> int:
+        """
+        Delete expired entries, then the oldest ones above the quota.
+        Returns the number of entries deleted.
+        """
+        # Running jobs count towards the quota even though they are kept.
+        entries = sorted(self._entries(), key=lambda entry: entry[3])
+        total = sum(size for _, _, size, _ in entries)
+
+        now = time.time()
+        removed = 0
+        for path, _, size, mtime in entries:
+            expired = self.ttl and now - mtime > self.ttl
+            over_quota = self.max_bytes and total > self.max_bytes
+            if not expired and not over_quota:
+                # Entries are sorted oldest first, the rest is newer.
+                break
+
+            with _active_lock:
+                # Checked right before deleting: the job may have started
+                # since the directory was listed.
+                if path in _active:
+                    continue
+                if path.is_dir() and not path.is_symlink():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            self.removed += removed
+            roots = ", ".join(str(root) for root in self.roots)
+            logging.info(f"Deleted {removed} stale entries from {roots}")
+        return removed
+
+    def start(self) -> threading.Thread:
+        """
+        Sweep now and then every `interval` seconds in a daemon thread.
+        """
+
+        def run() -> None:
+            while True:
+                try:
+                    self.sweep()
+                except Exception:
+                    logging.exception("Sweeping the output directories failed")
+                time.sleep(self.interval)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, name="output-sweeper", daemon=True)
+            self._thread.start()
+        return self._thread
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from pathlib import Path
+
+from .generate import build_resume_pdf
+from .models import Resume
+from .utils.workdirs import job_workdir
+
+
+# Set while the startup warm-up compile is running.
+warm_up_pending = threading.Event()
+
+# Exercises every section and icon of the templates so that a single
+# compile pulls all the packages and fonts they need into the tectonic cache.
+SAMPLE_RESUME = {
+    "meta": {
+        "pdf_title": "Jane Doe - Resume",
+        "pdf_author": "Jane Doe",
+    },
+    "header": {
+        "name": "Jane Doe",
+        "location": "Paris, France",
+        "email": "jane.doe@example.com",
+        "phone": "+33 6 12 34 56 78",
+        "website_url": "https://example.com",
+        "website_label": "example.com",
+        "linkedin_url": "https://www.linkedin.com/in/janedoe",
+        "linkedin_handle": "janedoe",
+        "github_url": "https://github.com/janedoe",
+        "github_handle": "janedoe",
+    },
+    "intro_paragraphs": [
+        "Software engineer with 8 years of experience building data platforms.",
+    ],
+    "education": [
+        {
+            "degree": "MSc",
+            "date_range": "2014 - 2016",
+            "institution": "Sorbonne University",
+            "field_of_study": "Computer Science",
+            "highlights": ["Graduated with honours & a 95% thesis grade"],
+        }
+    ],
+    "experience": [
+        {
+            "company": "Acme",
+            "role": "Senior Engineer",
+            "location": "Paris",
+            "date_range": "2018 - present",
+            "highlights": [
+                "Led a team of 5 engineers",
+                "Cut infrastructure costs by 30%",
+            ],
+        }
+    ],
+    "projects": [
+        {
+            "title": "resume_tools",
+            "repo_url": "https://github.com/janedoe/resume_tools",
+            "repo_label": "janedoe/resume_tools",
+            "highlights": ["Open-source toolkit with 1k stars"],
+        }
+    ],
+    "technologies_section": {
+        "languages": ["Python", "C++"],
+        "technologies": ["PostgreSQL", "Kubernetes"],
+    },
+}
+
+
+def warm_up(template_name: str, templates_dir: Path, output_dir: Path) -> float:
+    """
+    Compile the sample resume once so that the tectonic bundle cache is
+    populated before the server accepts traffic. Returns the elapsed time.
+    """
+    started = time.perf_counter()
+
+    with job_workdir(output_dir, "warmup") as workdir:
+        build_resume_pdf(
+            model=Resume.model_validate(SAMPLE_RESUME),
+            base_name="warmup",
+            template_name=template_name,
+            templates_dir=templates_dir,
+            output_dir=workdir,
+        )
+
+    elapsed = time.perf_counter() - started
+    logging.info(f"Tectonic warm-up compile finished in {elapsed:.2f}s")
+
+    return elapsed
+
+
+def warm_up_in_background(
+    template_name: str, templates_dir: Path, output_dir: Path
+) -> threading.Thread:
+    """
+    Run `warm_up` in a daemon thread so the server can answer liveness
+    probes meanwhile; `warm_up_pending` is set until it finishes.
+    """
+
+    def run() -> None:
+        try:
+            warm_up(template_name, templates_dir, output_dir)
+        except Exception:
+            logging.exception("Tectonic warm-up failed, first requests will be slow")
+        finally:
+            warm_up_pending.clear()
+
+    warm_up_pending.set()
+    thread = threading.Thread(target=run, name="tectonic-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,59 @@
+import asyncio
+from pathlib import Path
+
+import src.generate as generate
+from src.utils.admission import AdmissionController
+from src.utils.scheduler import CompileScheduler
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+TEMPLATE_NAME = "classic.tex.j2"
+
+
+def _payload(index, **extra):
+    return {
+        "pdf_title": "Resume",
+        "pdf_author": f"Person {index}",
+        "name": f"Person {index}",
+        "location": "Paris, France",
+        "email": f"person{index}@example.com",
+        **extra,
+    }
+
+
+def test_batch_with_max_pages_is_not_rejected_by_admission(monkeypatch, tmp_path):
+    scheduler = CompileScheduler(workers=4)
+    admission = AdmissionController(scheduler)
+    peak = 0
+
+    async def compile_pdf_async(output_tex_path, output_pdf_path):
+        nonlocal peak
+        async with scheduler.async_slot(output_tex_path.stem):
+            peak = max(peak, scheduler.stats()["queued"])
+            await asyncio.sleep(0.05)
+        output_pdf_path.write_bytes(b"%PDF")
+        return {"pages": 1}
+
+    async def upload_bytes_to_bucket_async(data, destination_blob_name):
+        return f"https://example.com/{destination_blob_name}"
+
+    monkeypatch.setattr(generate, "compile_scheduler", scheduler)
+    monkeypatch.setattr(generate, "compile_pdf_async", compile_pdf_async)
+    monkeypatch.setattr(
+        generate, "upload_bytes_to_bucket_async", upload_bytes_to_bucket_async
+    )
+    monkeypatch.setattr(generate, "JOB_TMP_ROOT", tmp_path)
+
+    results = asyncio.run(
+        generate.publish_resume_batch_async(
+            [_payload(index, max_pages=1) for index in range(8)],
+            template_name=TEMPLATE_NAME,
+            templates_dir=TEMPLATES_DIR,
+            output_dir=tmp_path,
+            admission=admission,
+        )
+    )
+
+    assert [result["error"] for result in results] == [None] * 8
+    assert all(result["url"].endswith(".pdf") for result in results)
+    assert peak < admission.queue_threshold
+    assert admission.stats()["rejected"] == 0
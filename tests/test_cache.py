@@ -0,0 +1,80 @@
+import copy
+from pathlib import Path
+
+from src.models import DocumentMeta
+from src.utils.cache import resume_cache_key
+from src.utils.drafts import Draft, DraftStore
+from src.utils.validation import patch_resume_model, validate_resume_document
+
+from .test_patch import RESUME
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+TEMPLATE_NAME = "classic.tex.j2"
+
+
+def _key(model, max_pages=None):
+    return resume_cache_key(model, TEMPLATE_NAME, TEMPLATES_DIR, max_pages)
+
+
+def _resume(**meta):
+    data = copy.deepcopy(RESUME)
+    del data["meta"]["last_updated_text"]
+    data["meta"].update(meta)
+    return validate_resume_document(data)
+
+
+def test_key_depends_on_content_and_page_limit():
+    resume = _resume()
+    other = patch_resume_model(
+        resume, [{"op": "replace", "path": "/header/name", "value": "John Doe"}]
+    )
+
+    assert _key(resume) == _key(_resume())
+    assert _key(resume) != _key(other)
+    assert _key(resume) != _key(resume, max_pages=1)
+
+
+def test_explicit_last_updated_text_is_part_of_the_key():
+    january = _resume(last_updated_text="January 2020")
+    march = _resume(last_updated_text="March 2026")
+
+    assert _key(january) != _key(march)
+
+
+def test_defaulted_last_updated_text_is_left_out_of_the_key():
+    resume = _resume()
+    # The same resume generated another month.
+    meta = DocumentMeta.model_construct(
+        _fields_set=resume.meta.model_fields_set,
+        **dict(resume.meta, last_updated_text="May 2999"),
+    )
+    later = resume.model_copy(update={"meta": meta})
+
+    assert "last_updated_text" not in later.meta.model_fields_set
+    assert _key(resume) == _key(later)
+
+
+def test_patches_keep_last_updated_text_defaulted():
+    resume = _resume()
+
+    retitled = patch_resume_model(
+        resume, [{"op": "replace", "path": "/meta/pdf_title", "value": "CV"}]
+    )
+    assert "last_updated_text" not in retitled.meta.model_fields_set
+
+    dated = patch_resume_model(
+        resume,
+        [{"op": "replace", "path": "/meta/last_updated_text", "value": "March 2026"}],
+    )
+    assert dated.meta.last_updated_text == "March 2026"
+    assert _key(dated) != _key(resume)
+
+
+def test_reloaded_drafts_keep_their_key(tmp_path):
+    resume = _resume()
+    draft_id = _key(resume)
+    DraftStore(tmp_path).put(draft_id, Draft(resume))
+
+    reloaded = DraftStore(tmp_path).get(draft_id)
+
+    assert _key(reloaded.resume) == draft_id
@@ -0,0 +1,30 @@
+from src.utils import preview, tex
+from src.utils.environments import EnvironmentRegistry
+
+
+def test_one_environment_per_templates_directory(tmp_path):
+    created = []
+
+    def factory(templates_dir):
+        created.append(templates_dir)
+        return object()
+
+    registry = EnvironmentRegistry(factory)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+
+    env = registry.get(tmp_path / "a")
+
+    assert registry.get(tmp_path / "b" / ".." / "a") is env
+    assert registry.get(tmp_path / "b") is not env
+    assert created == [tmp_path / "a", tmp_path / "b"]
+
+
+def test_tex_and_preview_keep_separate_environments(tmp_path):
+    tex_env = tex.get_environment(tmp_path)
+    preview_env = preview.get_environment(tmp_path)
+
+    assert tex_env is not preview_env
+    assert tex_env.block_start_string == "<<%"
+    assert preview_env.block_start_string == "{%"
+    assert tex.get_environment(tmp_path) is tex_env
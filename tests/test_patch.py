@@ -0,0 +1,276 @@
+import copy
+
+import pytest
+from pydantic import ValidationError
+
+from src.utils.patch import JsonPatchError, apply_patch
+from src.utils.validation import patch_resume_model, validate_resume_document
+
+
+def _entry(company):
+    return {
+        "company": company,
+        "role": "Engineer",
+        "location": "Paris",
+        "date_range": "2020 - 2022",
+        "highlights": ["Shipped things", "Fixed things"],
+    }
+
+
+RESUME = {
+    "meta": {
+        "pdf_title": "Jane Doe - Resume",
+        "pdf_author": "Jane Doe",
+        "last_updated_text": "January 2020",
+    },
+    "header": {
+        "name": "Jane Doe",
+        "location": "Paris, France",
+        "email": "jane.doe@example.com",
+    },
+    "intro_paragraphs": ["old intro"],
+    "education": [],
+    "experience": [_entry("Alpha"), _entry("Beta"), _entry("Gamma")],
+    "projects": [],
+    "technologies_section": {"languages": ["Python"], "technologies": []},
+}
+
+
+@pytest.fixture
+def resume():
+    return validate_resume_document(copy.deepcopy(RESUME))
+
+
+def _locations(error):
+    return [tuple(line["loc"]) for line in error.value.errors()]
+
+
+# apply_patch
+
+
+def test_add_sets_a_key_and_inserts_into_lists():
+    document = {"a": {"b": 1}, "list": [1, 2]}
+    apply_patch(
+        document,
+        [
+            {"op": "add", "path": "/a/c", "value": 2},
+            {"op": "add", "path": "/list/0", "value": 0},
+            {"op": "add", "path": "/list/-", "value": 3},
+        ],
+    )
+    assert document == {"a": {"b": 1, "c": 2}, "list": [0, 1, 2, 3]}
+
+
+def test_remove_and_replace():
+    document = {"a": 1, "b": 2, "list": [1, 2, 3]}
+    apply_patch(
+        document,
+        [
+            {"op": "remove", "path": "/a"},
+            {"op": "remove", "path": "/list/1"},
+            {"op": "replace", "path": "/b", "value": [4]},
+            {"op": "replace", "path": "/list/0", "value": 0},
+        ],
+    )
+    assert document == {"b": [4], "list": [0, 3]}
+
+
+def test_move_and_copy():
+    document = {"a": {"x": [1]}, "b": {}, "list": ["p", "q", "r"]}
+    apply_patch(
+        document,
+        [
+            {"op": "copy", "from": "/a/x", "path": "/b/x"},
+            {"op": "move", "from": "/a", "path": "/b/a"},
+            {"op": "move", "from": "/list/0", "path": "/list/-"},
+        ],
+    )
+    assert document == {"b": {"x": [1], "a": {"x": [1]}}, "list": ["q", "r", "p"]}
+    # Copies are independent of their source.
+    assert document["b"]["x"] is not document["b"]["a"]["x"]
+
+
+def test_test_operation():
+    document = {"a": [1, {"b": "c"}]}
+    apply_patch(document, [{"op": "test", "path": "/a/1", "value": {"b": "c"}}])
+
+    with pytest.raises(JsonPatchError, match="Test failed"):
+        apply_patch(document, [{"op": "test", "path": "/a/0", "value": 2}])
+
+
+def test_pointer_escapes():
+    document = {"a/b": 1, "m~n": 2, "~1": 3}
+    apply_patch(
+        document,
+        [
+            {"op": "replace", "path": "/a~1b", "value": 10},
+            {"op": "replace", "path": "/m~0n", "value": 20},
+            # "~01" is "~1", not "/".
+            {"op": "replace", "path": "/~01", "value": 30},
+        ],
+    )
+    assert document == {"a/b": 10, "m~n": 20, "~1": 30}
+
+
+def test_added_values_are_copied():
+    value = {"x": [1]}
+    document = {}
+    apply_patch(document, [{"op": "add", "path": "/a", "value": value}])
+    document["a"]["x"].append(2)
+    assert value == {"x": [1]}
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        {"op": "add", "path": "a", "value": 1},
+        {"op": "add", "path": "/missing/a", "value": 1},
+        {"op": "add", "path": "/list/4", "value": 1},
+        {"op": "add", "path": "/list/01", "value": 1},
+        {"op": "add", "path": "/list/x", "value": 1},
+        {"op": "add", "path": "/a/b/c", "value": 1},
+        {"op": "remove", "path": "/missing"},
+        {"op": "remove", "path": "/list/-"},
+        {"op": "remove", "path": "/list/3"},
+        {"op": "replace", "path": "/missing", "value": 1},
+        {"op": "move", "from": "/missing", "path": "/b"},
+        {"op": "copy", "from": "/list/9", "path": "/b"},
+        {"op": "test", "path": "/missing", "value": 1},
+        {"op": "add", "path": "", "value": {}},
+    ],
+)
+def test_invalid_pointers_are_rejected(operation):
+    document = {"a": 1, "list": [1, 2, 3]}
+    with pytest.raises(JsonPatchError):
+        apply_patch(document, [operation])
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        "not an object",
+        {"path": "/a"},
+        {"op": "frobnicate", "path": "/a"},
+        {"op": "add", "path": "/a"},
+        {"op": "replace", "value": 1},
+        {"op": "move", "path": "/a"},
+        {"op": "copy", "path": "/a", "from": 1},
+    ],
+)
+def test_malformed_operations_are_rejected(operation):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": 1}, [operation])
+
+
+def test_move_into_its_own_child_is_rejected():
+    document = {"a": {"b": {}}}
+    with pytest.raises(JsonPatchError, match="into itself"):
+        apply_patch(document, [{"op": "move", "from": "/a", "path": "/a/b/c"}])
+    assert document == {"a": {"b": {}}}
+
+
+def test_touched_holds_the_containers_walked_through():
+    document = {"a": {"b": {"c": 1}}, "d": {"e": 2}}
+    touched = apply_patch(document, [{"op": "replace", "path": "/a/b/c", "value": 3}])
+    assert id(document["a"]) in touched
+    assert id(document["a"]["b"]) in touched
+    assert id(document["d"]) not in touched
+
+
+# patch_resume_model
+
+
+def test_untouched_sub_models_are_reused(resume):
+    patched = patch_resume_model(
+        resume,
+        [{"op": "replace", "path": "/experience/1/role", "value": "Lead"}],
+    )
+
+    assert [e.role for e in patched.experience] == ["Engineer", "Lead", "Engineer"]
+    assert patched.experience[0] is resume.experience[0]
+    assert patched.experience[1] is not resume.experience[1]
+    assert patched.experience[2] is resume.experience[2]
+    assert patched.header is resume.header
+    assert patched.intro_paragraphs is resume.intro_paragraphs
+    assert resume.experience[1].role == "Engineer"
+
+
+def test_replace_intro_paragraphs(resume):
+    patched = patch_resume_model(
+        resume, [{"op": "replace", "path": "/intro_paragraphs", "value": ["new intro"]}]
+    )
+    assert patched.intro_paragraphs == ["new intro"]
+
+
+def test_replace_a_whole_section(resume):
+    header = dict(RESUME["header"], name="John Doe")
+    patched = patch_resume_model(resume, [{"op": "replace", "path": "/header", "value": header}])
+
+    assert patched.header.name == "John Doe"
+    assert patched.meta is resume.meta
+
+
+def test_replace_a_whole_list(resume):
+    patched = patch_resume_model(
+        resume,
+        [{"op": "replace", "path": "/experience", "value": [_entry("A"), _entry("B")]}],
+    )
+    assert [e.company for e in patched.experience] == ["A", "B"]
+
+
+def test_remove_then_add(resume):
+    patched = patch_resume_model(
+        resume,
+        [
+            {"op": "remove", "path": "/experience/1"},
+            {"op": "remove", "path": "/experience/0"},
+            {"op": "add", "path": "/experience/0", "value": _entry("NEW")},
+        ],
+    )
+    assert [e.company for e in patched.experience] == ["NEW", "Gamma"]
+    assert patched.experience[1] is resume.experience[2]
+
+
+def test_moved_entries_are_kept(resume):
+    patched = patch_resume_model(
+        resume, [{"op": "move", "from": "/experience/0", "path": "/experience/-"}]
+    )
+    assert [e.company for e in patched.experience] == ["Beta", "Gamma", "Alpha"]
+    assert patched.experience[2] is resume.experience[0]
+
+
+def test_patched_strings_are_sanitized(resume):
+    patched = patch_resume_model(
+        resume,
+        [{"op": "replace", "path": "/experience/0/highlights/0", "value": "Cut costs → 30%"}],
+    )
+    assert "→" not in patched.experience[0].highlights[0]
+
+
+def test_errors_are_located_from_the_resume_root(resume):
+    with pytest.raises(ValidationError) as error:
+        patch_resume_model(
+            resume,
+            [{"op": "replace", "path": "/experience/0/highlights/1", "value": 12}],
+        )
+    assert _locations(error) == [("experience", 0, "highlights", 1)]
+
+
+def test_unsupported_characters_are_located_from_the_resume_root(resume):
+    with pytest.raises(ValidationError) as error:
+        patch_resume_model(
+            resume,
+            [{"op": "add", "path": "/experience/2/highlights/-", "value": "中文"}],
+        )
+    assert _locations(error) == [("experience", 2, "highlights", 2)]
+
+
+def test_removing_a_required_section_fails(resume):
+    with pytest.raises(ValidationError) as error:
+        patch_resume_model(resume, [{"op": "remove", "path": "/header"}])
+    assert _locations(error) == [("header",)]
+
+
+def test_malformed_patches_raise_json_patch_error(resume):
+    with pytest.raises(JsonPatchError):
+        patch_resume_model(resume, [{"op": "remove", "path": "/experience/7"}])
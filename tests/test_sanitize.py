@@ -0,0 +1,111 @@
+import copy
+
+import pytest
+from pydantic import ValidationError
+
+from src.models import Resume
+from src.utils.validation import (
+    GLYPH_COVERAGE,
+    TRANSLITERATIONS,
+    sanitize_resume,
+    sanitize_text,
+    validate_resume_document,
+)
+
+from .test_patch import RESUME
+
+
+def _document(**highlights):
+    data = copy.deepcopy(RESUME)
+    for index, text in highlights.items():
+        data["experience"][0]["highlights"][int(index[1:])] = text
+    return data
+
+
+def _locations(error):
+    return [tuple(line["loc"]) for line in error.value.errors()]
+
+
+# sanitize_text
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Plain ASCII, 100% & $5 ~ {braces}",
+        "Crème brûlée à Zürich, ¿qué? «naïve» ±½ £€",
+        "Łódź, Kraków, Dvořák, Şişli, Œuvre",
+        "Shipped – on time — “quoted” ‘quoted’ … • †",
+        "soft\u00adhyphen",
+    ],
+)
+def test_covered_text_passes_through(text):
+    assert sanitize_text(text) == (text, [])
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Cut costs → 30%", "Cut costs -> 30%"),
+        ("Latency ≤ 10 ms", "Latency <= 10 ms"),
+        ("eﬃcient ﬁles", "efficient files"),
+        ("Ｒｕｓｔ ｔｅａｍ", "Rust team"),
+        ("Tiếng Việt", "Tieng Viet"),
+        ("ten\u2009k users", "ten k users"),
+        ("zero\u200bwidth", "zerowidth"),
+        ("★ Award", "* Award"),
+    ],
+)
+def test_mapped_characters_get_a_stand_in(text, expected):
+    assert sanitize_text(text) == (expected, [])
+
+
+@pytest.mark.parametrize(
+    ("text", "unsupported"),
+    [
+        ("Launch 🚀🚀", ["🚀"]),
+        ("中文 team", ["中", "文"]),
+    ],
+)
+def test_characters_without_stand_in_are_reported(text, unsupported):
+    assert sanitize_text(text)[1] == unsupported
+
+
+def test_transliterations_only_cover_missing_glyphs():
+    assert not [char for char in TRANSLITERATIONS if char in GLYPH_COVERAGE]
+    assert all(
+        c in GLYPH_COVERAGE for mapped in TRANSLITERATIONS.values() for c in mapped
+    )
+
+
+# sanitize_resume
+
+
+@pytest.mark.parametrize("text", ["Launch 🚀", "中文"])
+def test_unsupported_characters_are_located(text):
+    with pytest.raises(ValidationError) as error:
+        validate_resume_document(_document(h1=text))
+    assert _locations(error) == [("experience", 0, "highlights", 1)]
+
+    # Models built without the sanitizer are checked the same way.
+    with pytest.raises(ValidationError) as error:
+        sanitize_resume(Resume.model_validate(_document(h1=text)))
+    assert _locations(error) == [("experience", 0, "highlights", 1)]
+    assert error.value.errors()[0]["type"] == "unsupported_character"
+
+
+def test_covered_resume_is_returned_as_is():
+    resume = validate_resume_document(_document())
+    assert sanitize_resume(resume) is resume
+
+
+def test_defaulted_last_updated_text_survives():
+    data = _document(h0="Cut costs → 30%")
+    del data["meta"]["last_updated_text"]
+    resume = Resume.model_validate(data)
+
+    sanitized = sanitize_resume(resume)
+
+    assert sanitized.experience[0].highlights[0] == "Cut costs -> 30%"
+    assert "last_updated_text" not in sanitized.meta.model_fields_set
+    assert sanitized.meta.last_updated_text == resume.meta.last_updated_text
@@ -0,0 +1,241 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.deadline import DeadlineExceeded
+from src.utils.scheduler import CompileJob, CompileScheduler, SchedulerFull
+
+
+def _wait_until(predicate, timeout=2.0):
+    expires = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > expires:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.005)
+
+
+def test_runs_up_to_workers_without_queueing():
+    scheduler = CompileScheduler(workers=2)
+
+    with scheduler.slot("a"), scheduler.slot("b"):
+        stats = scheduler.stats()
+        assert stats["running"] == 2
+        assert stats["queued"] == 0
+
+    stats = scheduler.stats()
+    assert stats["running"] == 0
+    assert stats["completed"] == 2
+
+
+def test_slots_are_handed_over_in_fifo_order():
+    scheduler = CompileScheduler(workers=1)
+    order = []
+
+    def job(index):
+        with scheduler.slot(str(index)):
+            order.append(index)
+
+    with scheduler.slot("holder"):
+        threads = []
+        for index in range(4):
+            thread = threading.Thread(target=job, args=(index,))
+            thread.start()
+            threads.append(thread)
+            _wait_until(lambda: scheduler.stats()["queued"] == index + 1)
+
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert order == [0, 1, 2, 3]
+    assert scheduler.stats()["running"] == 0
+
+
+def test_async_slots_are_handed_over_in_fifo_order():
+    scheduler = CompileScheduler(workers=1)
+    order = []
+
+    async def job(index):
+        async with scheduler.async_slot(str(index)):
+            order.append(index)
+            await asyncio.sleep(0)
+
+    async def run():
+        async with scheduler.async_slot("holder"):
+            tasks = []
+            for index in range(4):
+                tasks.append(asyncio.create_task(job(index)))
+                await asyncio.sleep(0)
+            assert scheduler.stats()["queued"] == 4
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert order == [0, 1, 2, 3]
+    assert scheduler.stats()["running"] == 0
+
+
+def test_rejects_jobs_beyond_the_queue_depth():
+    scheduler = CompileScheduler(workers=1, max_queue=1)
+
+    async def run():
+        async with scheduler.async_slot("holder"):
+            queued = asyncio.create_task(scheduler._acquire_async())
+            await asyncio.sleep(0)
+
+            with pytest.raises(SchedulerFull):
+                await scheduler._acquire_async()
+            with pytest.raises(SchedulerFull):
+                scheduler._acquire()
+
+        await queued
+        scheduler._release(CompileJob("queued"))
+
+    asyncio.run(run())
+
+    stats = scheduler.stats()
+    assert stats["rejected"] == 2
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+
+def test_waiting_past_the_timeout_leaves_the_queue():
+    scheduler = CompileScheduler(workers=1)
+
+    with scheduler.slot("holder"):
+        with pytest.raises(DeadlineExceeded):
+            with scheduler.slot("late", timeout=0.05):
+                pass
+        assert scheduler.stats()["queued"] == 0
+
+    assert scheduler.stats()["running"] == 0
+
+
+def test_async_waiting_past_the_timeout_leaves_the_queue():
+    scheduler = CompileScheduler(workers=1)
+
+    async def run():
+        async with scheduler.async_slot("holder"):
+            with pytest.raises(DeadlineExceeded):
+                async with scheduler.async_slot("late", timeout=0.05):
+                    pass
+            assert scheduler.stats()["queued"] == 0
+
+    asyncio.run(run())
+
+    assert scheduler.stats()["running"] == 0
+
+
+def test_slot_handed_over_as_the_wait_times_out_is_kept():
+    scheduler = CompileScheduler(workers=1)
+    scheduler._acquire()
+    outcome = []
+
+    def waiter():
+        try:
+            scheduler._acquire(timeout=0.05)
+            outcome.append("acquired")
+        except DeadlineExceeded:
+            outcome.append("timed out")
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    _wait_until(lambda: scheduler.stats()["queued"] == 1)
+
+    # Hold the lock past the waiter's timeout, then release the running job
+    # the way _release does, so the hand-over lands after the wait expired.
+    with scheduler._lock:
+        time.sleep(0.2)
+        scheduler._hand_over()
+    thread.join(timeout=2)
+
+    assert outcome == ["acquired"]
+    stats = scheduler.stats()
+    assert stats["running"] == 1
+    assert stats["queued"] == 0
+
+
+def test_async_slot_handed_over_as_the_wait_times_out_is_passed_on():
+    scheduler = CompileScheduler(workers=1)
+    scheduler._acquire()
+
+    def release_late():
+        with scheduler._lock:
+            time.sleep(0.2)
+            scheduler._hand_over()
+
+    async def run():
+        waiter = asyncio.create_task(scheduler._acquire_async(timeout=0.05))
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"] == 1
+
+        thread = threading.Thread(target=release_late)
+        thread.start()
+        try:
+            with pytest.raises(DeadlineExceeded):
+                await waiter
+        finally:
+            thread.join(timeout=2)
+
+    asyncio.run(run())
+
+    # The waiter gave up, so the slot it was handed must not leak.
+    stats = scheduler.stats()
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = CompileScheduler(workers=1)
+    order = []
+
+    async def job(label):
+        async with scheduler.async_slot(label):
+            order.append(label)
+
+    async def run():
+        async with scheduler.async_slot("holder"):
+            cancelled = asyncio.create_task(job("cancelled"))
+            kept = asyncio.create_task(job("kept"))
+            await asyncio.sleep(0)
+            assert scheduler.stats()["queued"] == 2
+
+            cancelled.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await cancelled
+            assert scheduler.stats()["queued"] == 1
+
+        await kept
+
+    asyncio.run(run())
+
+    assert order == ["kept"]
+    assert scheduler.stats()["running"] == 0
+
+
+def test_waiter_cancelled_after_hand_over_passes_the_slot_on():
+    scheduler = CompileScheduler(workers=1)
+    order = []
+
+    async def job(label):
+        async with scheduler.async_slot(label):
+            order.append(label)
+
+    async def run():
+        scheduler._acquire()
+        first = asyncio.create_task(job("first"))
+        second = asyncio.create_task(job("second"))
+        await asyncio.sleep(0)
+
+        # The slot is handed to `first`, which is cancelled before it runs.
+        scheduler._release(CompileJob("holder"))
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await second
+
+    asyncio.run(run())
+
+    assert order == ["second"]
+    assert scheduler.stats()["running"] == 0
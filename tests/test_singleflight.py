@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from src.utils.deadline import DeadlineExceeded, deadline
+from src.utils.singleflight import SingleFlight
+
+
+def test_identical_calls_share_one_run():
+    flight = SingleFlight()
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "url"
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async("k", build) for _ in range(3)))
+
+    results = asyncio.run(run())
+
+    assert calls == [1]
+    assert results == [("url", False), ("url", True), ("url", True)]
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 2}
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    calls = []
+
+    def build(key):
+        async def fn():
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        return fn
+
+    async def run():
+        return await asyncio.gather(
+            flight.do_async("a", build("a")), flight.do_async("b", build("b"))
+        )
+
+    assert asyncio.run(run()) == [("a", False), ("b", False)]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_calls_after_completion_run_again():
+    flight = SingleFlight()
+    calls = []
+
+    async def build():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        first = await flight.do_async("k", build)
+        second = await flight.do_async("k", build)
+        return first, second
+
+    assert asyncio.run(run()) == ((1, False), (2, False))
+
+
+def test_errors_are_shared_with_waiters():
+    flight = SingleFlight()
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do_async("k", build),
+            flight.do_async("k", build),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert calls == [1]
+    assert all(isinstance(r, ValueError) and str(r) == "boom" for r in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_follower_takes_over_when_the_leader_is_cancelled():
+    flight = SingleFlight()
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return "url"
+
+    async def run():
+        leader = asyncio.create_task(flight.do_async("k", build))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do_async("k", build))
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == ("url", False)
+    assert calls == [1, 1]
+    assert flight.stats() == {"in_flight": 0, "leaders": 2, "coalesced": 1}
+
+
+def test_follower_deadline_does_not_cancel_the_leader():
+    flight = SingleFlight()
+
+    async def build():
+        await asyncio.sleep(0.2)
+        return "url"
+
+    async def follow():
+        await asyncio.sleep(0.01)
+        with deadline(0.05):
+            return await flight.do_async("k", build)
+
+    async def run():
+        return await asyncio.gather(
+            flight.do_async("k", build), follow(), return_exceptions=True
+        )
+
+    leader, follower = asyncio.run(run())
+
+    assert leader == ("url", False)
+    assert isinstance(follower, DeadlineExceeded)
@@ -0,0 +1,85 @@
+import os
+import time
+
+import pytest
+
+from src.utils.workdirs import OutputSweeper, job_workdir
+
+
+def _leftover(path, size, age):
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_job_workdir_is_removed_on_success_and_error(tmp_path):
+    with job_workdir(tmp_path, "job") as workdir:
+        (workdir / "a.pdf").write_bytes(b"pdf")
+        assert workdir.parent == tmp_path
+        assert workdir.name.startswith("job-")
+    assert not workdir.exists()
+
+    with pytest.raises(RuntimeError):
+        with job_workdir(tmp_path, "job") as workdir:
+            raise RuntimeError("compile failed")
+    assert not workdir.exists()
+
+
+def test_expired_entries_are_swept_from_every_root(tmp_path):
+    output, jobs = tmp_path / "output", tmp_path / "jobs"
+    output.mkdir()
+    jobs.mkdir()
+    _leftover(output / "old.pdf", 10, age=7200)
+    _leftover(output / "new.pdf", 10, age=0)
+    stale = jobs / "tectonic-dead"
+    stale.mkdir()
+    _leftover(stale / "texput.pdf", 10, age=7200)
+    os.utime(stale, (time.time() - 7200,) * 2)
+
+    sweeper = OutputSweeper([output, jobs], ttl=3600)
+
+    assert sweeper.usage() == {"jobs": 0, "artifacts": 3, "bytes": 30}
+    assert sweeper.sweep() == 2
+    assert os.listdir(output) == ["new.pdf"]
+    assert os.listdir(jobs) == []
+
+
+def test_oldest_entries_are_swept_above_the_quota(tmp_path):
+    for index, name in enumerate(["a.pdf", "b.pdf", "c.pdf"]):
+        _leftover(tmp_path / name, 100, age=30 - index * 10)
+
+    sweeper = OutputSweeper([tmp_path], ttl=0, max_bytes=150)
+
+    assert sweeper.sweep() == 2
+    assert os.listdir(tmp_path) == ["c.pdf"]
+
+
+def test_running_jobs_are_never_swept(tmp_path):
+    sweeper = OutputSweeper([tmp_path], ttl=1, max_bytes=1)
+
+    with job_workdir(tmp_path, "job") as workdir:
+        _leftover(workdir / "a.pdf", 100, age=7200)
+        os.utime(workdir, (time.time() - 7200,) * 2)
+
+        assert sweeper.usage()["jobs"] == 1
+        assert sweeper.sweep() == 0
+        assert (workdir / "a.pdf").exists()
+
+
+def test_jobs_started_while_sweeping_are_kept(tmp_path):
+    _leftover(tmp_path / "old.pdf", 100, age=7200)
+
+    class Sweeper(OutputSweeper):
+        def _entries(self):
+            entries = super()._entries()
+            # A job starts right after the directory was listed.
+            self.job = job_workdir(tmp_path, "job")
+            workdir = self.job.__enter__()
+            return entries + [(workdir, 0, 100, 0.0)]
+
+    sweeper = Sweeper([tmp_path], ttl=1, max_bytes=1)
+    try:
+        assert sweeper.sweep() == 1
+        assert [name.split("-")[0] for name in os.listdir(tmp_path)] == ["job"]
+    finally:
+        sweeper.job.__exit__(None, None, None)